@@ -1,26 +1,29 @@
 # coding=utf-8
 
+import collections
 import copy
 import datetime
 import decimal
 import enum
 import functools
+import importlib
+import threading
 import time
 import itertools
-import pprint
 import re
 import translationstring
 import warnings
 import types
-
-from iso8601 import iso8601
+import weakref
 
 from .compat import (
     text_,
     text_type,
     string_types,
     xrange,
+    intern,
     is_nonstr_iter,
+    PY2,
     )
 
 _ = translationstring.TranslationStringFactory('colander')
@@ -30,6 +33,9 @@ class _required(object):
     def __repr__(self):
         return '<colander.required>'
 
+    def __reduce__(self):
+        return 'required' # when unpickled, refers to "required" below
+
 required = _required()
 _marker = required # bw compat
 
@@ -58,6 +64,9 @@ class _drop(object):
     def __repr__(self):
         return '<colander.drop>'
 
+    def __reduce__(self):
+        return 'drop' # when unpickled, refers to "drop" below (singleton)
+
 drop = _drop()
 
 def interpolate(msgs):
@@ -67,6 +76,102 @@ def interpolate(msgs):
         else:
             yield s
 
+class LazyMessage(object):
+    """ An error message which is only built when it is needed.
+
+    It may be passed as the ``msg`` of a :exc:`colander.Invalid` error:
+    the first time the ``msg`` attribute of the error is read, e.g. by its
+    ``messages``, ``asdict`` or ``__str__`` methods, ``factory`` is called
+    with ``args`` and the result becomes the message.  Errors which are
+    caught and discarded thus never build their message.  For example::
+
+        raise colander.Invalid(
+            node, colander.LazyMessage(_, '${val} is too big',
+                                       {'val': value}))
+    """
+    __slots__ = ('factory', 'args')
+
+    def __init__(self, factory, *args):
+        self.factory = factory
+        self.args = args
+
+    def __call__(self):
+        return self.factory(*self.args)
+
+# Values of error messages whose string is longer than this are truncated.
+MAX_VALUE_LENGTH = 200
+
+def _repr_parts(value):
+    # the successive pieces of ``repr(value)``, so that the beginning of the
+    # repr of a huge container can be had without building all of it
+    kind = type(value)
+    if kind is dict:
+        yield '{'
+        for index, (key, item) in enumerate(value.items()):
+            if index:
+                yield ', '
+            for part in _repr_parts(key):
+                yield part
+            yield ': '
+            for part in _repr_parts(item):
+                yield part
+        yield '}'
+    elif kind in _repr_brackets and (value or kind in (list, tuple)):
+        opening, closing = _repr_brackets[kind]
+        yield opening
+        for index, item in enumerate(value):
+            if index:
+                yield ', '
+            for part in _repr_parts(item):
+                yield part
+        if kind is tuple and len(value) == 1:
+            yield ','
+        yield closing
+    else:
+        yield repr(value)
+
+_repr_brackets = {
+    list: ('[', ']'),
+    tuple: ('(', ')'),
+    set: ('{', '}'),
+    frozenset: ('frozenset({', '})'),
+    }
+
+def _shorten(value):
+    # ``value``, or the truncated string of ``value`` if it is a string or
+    # a container whose string would be too long for an error message
+    if isinstance(value, string_types):
+        if len(value) > MAX_VALUE_LENGTH:
+            return value[:MAX_VALUE_LENGTH] + '...'
+    elif type(value) is dict or type(value) in _repr_brackets:
+        text = ''
+        for part in _repr_parts(value):
+            text += part
+            if len(text) > MAX_VALUE_LENGTH:
+                return text_type(text[:MAX_VALUE_LENGTH] + '...')
+    return value
+
+def _message(msgid, mapping):
+    for name in ('val', 'cstruct'): # the value which is not valid
+        if name in mapping:
+            mapping[name] = _shorten(mapping[name])
+    return _(msgid, mapping=mapping)
+
+def _lazy(msgid, mapping):
+    # the error messages of colander are translation strings of the
+    # colander domain, built when they are read
+    return LazyMessage(_message, msgid, mapping)
+
+class _LazyMsg(object):
+    # the ``msg`` attribute of the Invalid errors constructed with a
+    # LazyMessage: builds the message the first time it is read and stores it
+    # in the instance, which then shadows this descriptor
+    def __get__(self, inst, cls):
+        if inst is None:
+            return self
+        msg = inst.__dict__['msg'] = inst._lazy_msg()
+        return msg
+
 class UnboundDeferredError(Exception):
     """
     An exception raised by :meth:`SchemaNode.deserialize` when an attempt
@@ -89,14 +194,25 @@ class Invalid(Exception):
 
     The constructor additionally may receive an optional ``value``
     keyword, indicating the value related to the error.
+
+    The ``msg`` argument may be a :class:`colander.LazyMessage`, which is
+    replaced by the message it builds the first time the ``msg`` attribute
+    is read.  The messages of the errors raised by colander's types and validators
+    are built this way; the values they quote are truncated to
+    :data:`colander.MAX_VALUE_LENGTH` characters.
     """
     pos = None
     positional = False
 
+    msg = _LazyMsg()
+
     def __init__(self, node, msg=None, value=None):
         Exception.__init__(self, node, msg)
         self.node = node
-        self.msg = msg
+        if isinstance(msg, LazyMessage):
+            self._lazy_msg = msg
+        else:
+            self.msg = msg
         self.value = value
         self.children = []
 
@@ -150,12 +266,9 @@ class Invalid(Exception):
         of the exception upon which it is called is a schema node
         representing a mapping.
         """
-        for num, child in enumerate(self.node.children):
-            if child.name == name:
-                exc = Invalid(child, msg)
-                self.add(exc, num)
-                return
-        raise KeyError(name)
+        num = _child_position(self.node, name)
+        exc = Invalid(self.node.children[num], msg)
+        self.add(exc, num)
 
     def paths(self):
         """ A generator which returns each path through the exception
@@ -163,19 +276,22 @@ class Invalid(Exception):
         nodes.  Within each tuple, the leftmost item will represent
         the root schema node, the rightmost item will represent the
         leaf schema node."""
-        def traverse(node, stack):
-            stack.append(node)
-
-            if not node.children:
-                yield tuple(stack)
-
-            for child in node.children:
-                for path in traverse(child, stack):
-                    yield path
-
-            stack.pop()
-
-        return traverse(self, [])
+        path = [self]
+        todo = [iter(self.children)] # the children left to visit per level
+        if not self.children:
+            yield (self,)
+        while todo:
+            for child in todo[-1]:
+                path.append(child)
+                if child.children:
+                    todo.append(iter(child.children))
+                else:
+                    yield tuple(path)
+                    path.pop()
+                break
+            else:
+                todo.pop()
+                path.pop()
 
     def _keyname(self):
         if self.positional:
@@ -192,28 +308,60 @@ class Invalid(Exception):
 
         If ``separator`` is supplied, error messages are joined with that.
         """
-        paths = self.paths()
-        errors = {}
-        for path in paths:
-            keyparts = []
-            msgs = []
-            for exc in path:
-                exc.msg and msgs.extend(exc.messages())
-                keyname = exc._keyname()
-                keyname and keyparts.append(keyname)
-            if translate:
-                msgs = [translate(msg) for msg in msgs]
-            msgs = interpolate(msgs)
+        return dict(self.iter_errors(translate, separator))
+
+    def iter_errors(self, translate=None, separator='; '):
+        """ A generator which yields a ``(key, messages)`` pair for each
+        path through the exception graph, in the order of :meth:`paths`.
+        ``key`` is the dotted name of the leaf of the path and ``messages``
+        holds the messages of all the exceptions along the path, as in the
+        result of :meth:`asdict`, which receives the same ``translate`` and
+        ``separator`` arguments.
+
+        Unlike :meth:`asdict`, which builds the whole report at once, this
+        lets a large report be written out as it is produced.  The keys and
+        messages of the exceptions shared by several paths are only computed
+        once."""
+        def render(exc, key, msgs):
+            # the key and the rendered messages of the path ending at exc,
+            # given those of its parent
+            keyname = exc._keyname()
+            if keyname:
+                key = key and key + '.' + keyname or keyname
+            if exc.msg:
+                own = exc.messages()
+                if translate:
+                    own = [translate(msg) for msg in own]
+                msgs = msgs + tuple(interpolate(own))
+            return key, msgs
+
+        def report(key, msgs):
             if separator:
-                msgs = separator.join(msgs)
+                return key, separator.join(msgs)
+            return key, list(msgs)
+
+        key, msgs = render(self, '', ())
+        if not self.children:
+            yield report(key, msgs)
+        # the key, messages and children left to visit of each level
+        todo = [(key, msgs, iter(self.children))]
+        while todo:
+            key, msgs, children = todo[-1]
+            for child in children:
+                child_key, child_msgs = render(child, key, msgs)
+                if child.children:
+                    todo.append(
+                        (child_key, child_msgs, iter(child.children)))
+                else:
+                    yield report(child_key, child_msgs)
+                break
             else:
-                msgs = list(msgs)
-            errors['.'.join(keyparts)] = msgs
-        return errors
+                todo.pop()
 
     def __str__(self):
         """ Return a pretty-formatted string representation of the
         result of an execution of this exception's ``asdict`` method"""
+        import pprint # slow to import, and only needed here
         return pprint.pformat(self.asdict())
 
 
@@ -230,16 +378,25 @@ class UnsupportedFields(Invalid):
 
 class All(object):
     """ Composite validator which succeeds if none of its
-    subvalidators raises an :class:`colander.Invalid` exception"""
+    subvalidators raises an :class:`colander.Invalid` exception.
+
+    When called with ``fail_fast=True``, the first error raised by a
+    subvalidator is raised as is and the remaining subvalidators are not
+    run."""
     def __init__(self, *validators):
         self.validators = validators
 
-    def __call__(self, node, value):
+    def __call__(self, node, value, fail_fast=False):
         excs = []
         for validator in self.validators:
             try:
-                validator(node, value)
+                if fail_fast and isinstance(validator, All):
+                    validator(node, value, fail_fast=True)
+                else:
+                    validator(node, value)
             except Invalid as e:
+                if fail_fast:
+                    raise
                 excs.append(e)
 
         if excs:
@@ -250,8 +407,12 @@ class All(object):
 
 class Any(All):
     """ Composite validator which succeeds if at least one of its
-    subvalidators does not raise an :class:`colander.Invalid` exception."""
-    def __call__(self, node, value):
+    subvalidators does not raise an :class:`colander.Invalid` exception.
+
+    ``fail_fast`` is accepted for compatibility with :class:`colander.All`
+    but has no effect: every subvalidator has to fail for this validator
+    to fail."""
+    def __call__(self, node, value, fail_fast=False):
         try:
             return super(Any, self).__call__(node, value)
         except Invalid as e:
@@ -338,14 +499,27 @@ class Regex(object):
     """
     def __init__(self, regex, msg=None, flags=0):
         if isinstance(regex, string_types):
-            self.match_object = re.compile(regex, flags)
+            # compiled on first use, so that creating the validator (e.g.
+            # when colander is imported) stays cheap
+            self._match_object = None
+            self._pattern = (regex, flags)
         else:
-            self.match_object = regex
+            self._match_object = regex
         if msg is None:
             self.msg = _("String does not match expected pattern")
         else:
             self.msg = msg
 
+    def _get_match_object(self):
+        if self._match_object is None:
+            self._match_object = re.compile(*self._pattern)
+        return self._match_object
+
+    def _set_match_object(self, match_object):
+        self._match_object = match_object
+
+    match_object = property(_get_match_object, _set_match_object)
+
     def __call__(self, node, value):
         if self.match_object.match(value) is None:
             raise Invalid(node, self.msg)
@@ -410,13 +584,13 @@ class Range(object):
     def __call__(self, node, value):
         if self.min is not None:
             if value < self.min:
-                min_err = _(
+                min_err = _lazy(
                     self.min_err, mapping={'val':value, 'min':self.min})
                 raise Invalid(node, min_err)
 
         if self.max is not None:
             if value > self.max:
-                max_err = _(
+                max_err = _lazy(
                     self.max_err, mapping={'val':value, 'max':self.max})
                 raise Invalid(node, max_err)
 
@@ -458,29 +632,81 @@ class Length(object):
     def __call__(self, node, value):
         if self.min is not None:
             if len(value) < self.min:
-                min_err = _(self.min_err, mapping={'min': self.min})
+                min_err = _lazy(self.min_err, mapping={'min': self.min})
                 raise Invalid(node, min_err)
         if self.max is not None:
             if len(value) > self.max:
-                max_err = _(self.max_err, mapping={'max': self.max})
+                max_err = _lazy(self.max_err, mapping={'max': self.max})
                 raise Invalid(node, max_err)
 
 
-class OneOf(object):
+def _frozen_choices(choices):
+    # ``choices`` as a frozenset, if membership tests would give the same
+    # results, otherwise as is
+    if isinstance(choices, (list, tuple, set, frozenset)):
+        try:
+            return frozenset(choices)
+        except TypeError: # unhashable choices
+            pass
+    return choices
+
+class _Choices(object):
+    # Base class of the validators which check values against a collection
+    # of choices.  When the choices are assigned, they are copied to a
+    # frozenset if they are a list, tuple or set of hashable values, so
+    # that checking a value takes the same time whatever their number; the
+    # choices are then kept as a tuple (or as the frozenset, for a set), so
+    # that the attribute and the error messages show what is checked.
+    def _get_choices(self):
+        return self._choices
+
+    def _set_choices(self, choices):
+        lookup = _frozen_choices(choices)
+        if isinstance(lookup, frozenset):
+            if isinstance(choices, (set, frozenset)):
+                choices = lookup
+            else:
+                choices = tuple(choices)
+        self._choices = choices
+        self._lookup = lookup
+        self._joined = None
+
+    choices = property(_get_choices, _set_choices)
+
+    def _contains(self, value):
+        try:
+            return value in self._lookup
+        except TypeError: # an unhashable value
+            return value in self._choices
+
+    def _joined_choices(self):
+        # the choices as shown in error messages, joined on first use
+        if self._joined is None:
+            self._joined = ', '.join(['%s' % x for x in self._choices])
+        return self._joined
+
+class OneOf(_Choices):
     """ Validator which succeeds if the value passed to it is one of
-    a fixed set of values """
+    a fixed set of values.
+
+    When ``choices`` is a list, tuple or set of hashable values, it is
+    copied to a frozenset, so that checking a value takes the same time
+    however many choices there are, and the ``choices`` attribute of the
+    validator holds a tuple (or a frozenset, for a set) of them.  Changes
+    made to the object passed to the constructor are therefore ignored;
+    assign the ``choices`` attribute of the validator instead."""
     def __init__(self, choices):
         self.choices = choices
 
     def __call__(self, node, value):
-        if not value in self.choices:
-            choices = ', '.join(['%s' % x for x in self.choices])
-            err = _('"${val}" is not one of ${choices}',
-                    mapping={'val':value, 'choices':choices})
+        if not self._contains(value):
+            err = _lazy('"${val}" is not one of ${choices}',
+                        mapping={'val':value,
+                                 'choices':self._joined_choices()})
             raise Invalid(node, err)
 
 
-class NoneOf(object):
+class NoneOf(_Choices):
     """ Validator which succeeds if the value passed to it is none of a
     fixed set of values.
 
@@ -489,6 +715,10 @@ class NoneOf(object):
     it must be a string.  The string may contain the replacement targets
     ``${choices}`` and ``${val}``, representing the set of forbidden values
     and the provided value respectively.
+
+    Like those of :class:`colander.OneOf`, the forbidden values are kept in
+    a frozenset when possible; assign the ``forbidden`` attribute of the
+    validator to change them.
     """
     _MSG_ERR = _('"${val}" must not be one of ${choices}')
 
@@ -496,21 +726,27 @@ class NoneOf(object):
         self.forbidden = choices
         self.msg_err = msg_err
 
+    forbidden = _Choices.choices
+
     def __call__(self, node, value):
-        if value not in self.forbidden:
+        if not self._contains(value):
             return
 
-        choices = ', '.join(['%s' % x for x in self.forbidden])
-        err = _(self.msg_err, mapping={'val': value, 'choices': choices})
+        err = _lazy(self.msg_err, mapping={'val': value,
+                                           'choices': self._joined_choices()})
 
         raise Invalid(node, err)
 
 
-class ContainsOnly(object):
+class ContainsOnly(_Choices):
     """ Validator which succeeds if the value passed to is a sequence and each
     element in the sequence is also in the sequence passed as ``choices``.
     This validator is useful when attached to a schemanode with, e.g. a
     :class:`colander.Set` or another sequencetype.
+
+    Like those of :class:`colander.OneOf`, the choices are kept in a
+    frozenset when possible; assign the ``choices`` attribute of the
+    validator to change them.
     """
     err_template = _(
         'One or more of the choices you made was not acceptable'
@@ -519,13 +755,115 @@ class ContainsOnly(object):
         self.choices = choices
 
     def __call__(self, node, value):
-        if not set(value).issubset(self.choices):
-            err = _(
+        lookup = self._lookup
+        if isinstance(lookup, frozenset):
+            valid = lookup.issuperset(value)
+        else:
+            valid = set(value).issubset(self._choices)
+        if not valid:
+            err = _lazy(
                 self.err_template,
                 mapping = {'val':value, 'choices':self.choices}
                 )
             raise Invalid(node, err)
 
+class StringRules(All):
+    """ Composite validator which behaves like :class:`colander.All` with
+    the same subvalidators, but checks a value against all of them in a
+    single call.  The subvalidators must be :class:`colander.Length`,
+    :class:`colander.OneOf`, :class:`colander.NoneOf`,
+    :class:`colander.Regex` (such as :class:`colander.Email`) or
+    :class:`colander.All` validators composed of those; otherwise a
+    ``TypeError`` is raised.
+
+    The length of the value is checked first, then its membership of the
+    choices of the ``OneOf`` and ``NoneOf`` validators, which are kept in
+    frozensets when they are lists, tuples or sets of hashable values, and
+    finally the regular expressions.  When a check fails, the
+    subvalidators are run in turn, like ``All`` runs them, so that the
+    :exc:`colander.Invalid` error is the same.
+
+    The subvalidators are inspected when this validator is created, and
+    must not be changed afterwards.  :meth:`colander.SchemaNode.compile`
+    uses a ``StringRules`` in place of each ``All`` validator whose
+    subvalidators can be fused.
+    """
+    def __init__(self, *validators):
+        super(StringRules, self).__init__(*validators)
+        self._min = None
+        self._max = None
+        self._choices = []
+        self._forbidden = []
+        self._matches = []
+        self._fuse(validators)
+
+    def _fuse(self, validators):
+        for validator in validators:
+            kind = _fusible_kind(validator)
+            if kind is All:
+                self._fuse(validator.validators)
+            elif kind is Length:
+                if validator.min is not None and (
+                    self._min is None or validator.min > self._min):
+                    self._min = validator.min
+                if validator.max is not None and (
+                    self._max is None or validator.max < self._max):
+                    self._max = validator.max
+            elif kind is OneOf:
+                self._choices.append(validator._lookup)
+            elif kind is NoneOf:
+                self._forbidden.append(validator._lookup)
+            elif kind is Regex:
+                self._matches.append(validator.match_object.match)
+            else:
+                raise TypeError('%r cannot be fused' % (validator,))
+
+    def _valid(self, value):
+        if self._min is not None and len(value) < self._min:
+            return False
+        if self._max is not None and len(value) > self._max:
+            return False
+        for choices in self._choices:
+            if value not in choices:
+                return False
+        for forbidden in self._forbidden:
+            if value in forbidden:
+                return False
+        for match in self._matches:
+            if match(value) is None:
+                return False
+        return True
+
+    def __call__(self, node, value, fail_fast=False):
+        try:
+            if self._valid(value):
+                return
+        except TypeError: # e.g. an unhashable value
+            pass
+        super(StringRules, self).__call__(node, value, fail_fast)
+
+def _fusible(validator):
+    # true if StringRules can fuse the checks of ``validator``
+    kind = _fusible_kind(validator)
+    if kind is All:
+        return all(_fusible(v) for v in validator.validators)
+    return kind is not None
+
+def _fusible_kind(validator):
+    # the validator class whose checks ``validator`` performs, if
+    # StringRules can fuse them, otherwise None
+    impl = type(validator).__call__
+    return _fusible_validators.get(getattr(impl, '__func__', impl))
+
+_fusible_validators = {
+    All.__dict__['__call__']: All,
+    StringRules.__dict__['__call__']: All,
+    Length.__dict__['__call__']: Length,
+    OneOf.__dict__['__call__']: OneOf,
+    NoneOf.__dict__['__call__']: NoneOf,
+    Regex.__dict__['__call__']: Regex,
+    }
+
 def luhnok(node, value):
     """ Validator which checks to make sure that the value passes a luhn
     mod-10 checksum (credit cards).  ``value`` must be a string, not an
@@ -534,13 +872,13 @@ def luhnok(node, value):
         sum = _luhnok(value)
     except:
         raise Invalid(node,
-                      _('"${val}" is not a valid credit card number',
-                        mapping={'val': value}))
+                      _lazy('"${val}" is not a valid credit card number',
+                            mapping={'val': value}))
 
     if not (sum % 10) == 0:
         raise Invalid(node,
-                      _('"${val}" is not a valid credit card number',
-                        mapping={'val': value}))
+                      _lazy('"${val}" is not a valid credit card number',
+                            mapping={'val': value}))
 
 def _luhnok(value):
     sum = 0
@@ -560,7 +898,101 @@ def _luhnok(value):
 
 URL_REGEX = r"""(?i)\b((?:[a-z][\w-]+:(?:/{1,3}|[a-z0-9%])|www\d{0,3}[.]|[a-z0-9.\-]+[.][a-z]{2,4}/)(?:[^\s()<>]+|\(([^\s()<>]+|(\([^\s()<>]+\)))*\))+(?:\(([^\s()<>]+|(\([^\s()<>]+\)))*\)|[^\s`!()\[\]{};:'".,<>?«»“”‘’]))""" # "emacs!
 
-url = Regex(URL_REGEX, _('Must be a URL'))
+# The beginnings of a URL accepted by URL_REGEX: a scheme followed by one
+# to three slashes or by a character, "www." or a domain name followed by
+# a slash.
+_URL_SCHEME = re.compile(r'\b[a-z][\w-]+:(/{1,3}|[a-z0-9%])?', re.I)
+_URL_WWW = re.compile(r'\bwww\d{0,3}[.]', re.I)
+_URL_DOMAIN = re.compile(r'\b[a-z0-9.\-]+[.][a-z]{2,4}/', re.I)
+# The characters which may not end a URL.
+_URL_PUNCTUATION = frozenset(u'`!()[]{};:\'".,<>?\xab\xbb\u201c\u201d\u2018\u2019')
+
+def _url_group(value, pos):
+    # the end of the parenthesized group starting at value[pos], which may
+    # hold characters and parenthesized groups of characters, or -1
+    end = len(value)
+    pos += 1
+    while pos < end:
+        char = value[pos]
+        if char == ')':
+            return pos + 1
+        if char == '(':
+            pos += 1
+            start = pos
+            while (pos < end and value[pos] not in '()<>' and
+                   not value[pos].isspace()):
+                pos += 1
+            if pos == start or pos == end or value[pos] != ')':
+                return -1
+        elif char in '<>' or char.isspace():
+            return -1
+        pos += 1
+    return -1
+
+def _url_rest(value, pos):
+    # whether value[pos:] starts with the rest of a URL: characters and
+    # parenthesized groups, at least two of them, the last of which is a
+    # group or a character which may end a URL
+    count = 0
+    end = len(value)
+    while pos < end:
+        char = value[pos]
+        if char == '(':
+            pos = _url_group(value, pos)
+            if pos < 0:
+                return False
+            if count:
+                return True
+        elif char in ')<>' or char.isspace():
+            return False
+        else:
+            pos += 1
+            if count and char not in _URL_PUNCTUATION:
+                return True
+        count += 1
+    return False
+
+class URL(object):
+    """ URL validator.  It accepts the values whose beginning matches
+    :data:`colander.URL_REGEX`: a URL with a scheme, such as
+    ``http://example.com/`` or ``mailto:user@example.com``, or a URL
+    without a scheme starting with ``www.`` or with a domain name
+    followed by a slash.  Unlike matching the regular expression, which
+    can take exponential time on some malicious values, it takes linear
+    time.
+
+    If ``msg`` is supplied, it will be the error message to be used when
+    raising :exc:`colander.Invalid`; otherwise, defaults to 'Must be a
+    URL'.
+    """
+    def __init__(self, msg=None):
+        if msg is None:
+            msg = _('Must be a URL')
+        self.msg = msg
+
+    def __call__(self, node, value):
+        if not isinstance(value, string_types) or not self._match(value):
+            raise Invalid(node, self.msg)
+
+    def _match(self, value):
+        # the rest of the URL may start after each possible beginning
+        match = _URL_SCHEME.match(value)
+        if match is not None:
+            slashes = match.group(1) or ''
+            if slashes.startswith('/'):
+                start = match.start(1)
+                for pos in range(start + 1, start + len(slashes) + 1):
+                    if _url_rest(value, pos):
+                        return True
+            elif slashes and _url_rest(value, match.end()):
+                return True
+        for regex in (_URL_WWW, _URL_DOMAIN):
+            match = regex.match(value)
+            if match is not None and _url_rest(value, match.end()):
+                return True
+        return False
+
+url = URL()
 
 
 UUID_REGEX = r"""^(?:urn:uuid:)?\{?[a-f0-9]{8}(?:-?[a-f0-9]{4}){3}-?[a-f0-9]{12}\}?$"""
@@ -592,6 +1024,82 @@ class SchemaType(object):
     def cstruct_children(self, node, cstruct):
         return []
 
+class ConversionCache(object):
+    """ A bounded cache of the appstructs deserialized by a scalar type,
+    keyed by cstruct.  When it holds ``maxsize`` entries, storing another
+    one evicts the least recently used entry.  ``hits`` and ``misses``
+    count the lookups which found, or did not find, an entry.
+
+    A cache is created by the scalar types which accept a ``cache_size``
+    argument, and is available as their ``cache`` attribute.  Clear it
+    with its ``clear`` method after changing the configuration of its
+    type."""
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """ Return the value stored for ``key``, marking it as the most
+        recently used entry, or ``default`` if there is none."""
+        entries = self._entries
+        try:
+            value = entries.pop(key)
+        except KeyError:
+            self.misses += 1
+            return default
+        entries[key] = value
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        """ Store ``value`` for ``key``. """
+        entries = self._entries
+        entries.pop(key, None)
+        if len(entries) >= self.maxsize:
+            entries.popitem(last=False)
+        entries[key] = value
+
+    def clear(self):
+        """ Remove all entries and reset the statistics. """
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+class _CachedDeserialization(object):
+    # Mixin of the scalar types whose deserialization can be cached: they
+    # implement ``_deserialize`` and call ``_init_cache`` from their
+    # constructor.  Only results which are instances of ``_immutable`` are
+    # cached, so callers can't alter a cached appstruct.  Hashable
+    # cstructs are keyed by their type too, as ``1 == True == 1.0``.
+    cache = None
+    _immutable = ()
+
+    def _init_cache(self, cache_size):
+        if cache_size:
+            self.cache = ConversionCache(cache_size)
+
+    def deserialize(self, node, cstruct):
+        cache = self.cache
+        if cache is None:
+            return self._deserialize(node, cstruct)
+        key = (type(cstruct), cstruct)
+        try:
+            result = cache.get(key, _no_result)
+        except TypeError: # unhashable
+            return self._deserialize(node, cstruct)
+        if result is _no_result:
+            result = self._deserialize(node, cstruct)
+            if isinstance(result, self._immutable):
+                cache.set(key, result)
+        return result
+
+_no_result = object()
+
 class Mapping(SchemaType):
     """ A type which represents a mapping of names to nodes.
 
@@ -615,13 +1123,24 @@ class Mapping(SchemaType):
 
         - ``raise`` will cause a :exc:`colander.Invalid` exception to
           be raised when unknown keys are present in the cstruct
-          during deserialization.
+          during deserialization.  The keys are checked against the
+          names of the children before any child is deserialized.
 
         - ``preserve`` will preserve the 'raw' unknown keys and values
           in the appstruct returned by deserialization.
 
         Default: ``ignore``.
 
+    The constructor also accepts a ``copy_unknown`` keyword argument.  The
+    values of the unknown keys preserved by ``unknown='preserve'`` are deep
+    copies of the values of the cstruct; if ``copy_unknown`` is false, they
+    are the values of the cstruct themselves, which is faster but shares
+    them between the cstruct and the appstruct.  Default: ``True``.
+
+    A ``dict`` cstruct is not copied during deserialization, unless two
+    children of the node share a name; the keys which are not the name of
+    a child are only looked for when ``unknown`` is not ``ignore``.
+
     Special behavior is exhibited when a subvalue of a mapping is
     present in the schema but is missing from the mapping passed to
     either the ``serialize`` or ``deserialize`` method of this class.
@@ -638,8 +1157,11 @@ class Mapping(SchemaType):
     the values in the returned dictionary is the serialized
     representation of the null value for its type.
     """
-    def __init__(self, unknown='ignore'):
+    copy_unknown = True
+
+    def __init__(self, unknown='ignore', copy_unknown=True):
         self.unknown = unknown
+        self.copy_unknown = copy_unknown
 
     def _set_unknown(self, value):
         if not value in ('ignore', 'raise', 'preserve'):
@@ -661,7 +1183,7 @@ class Mapping(SchemaType):
                 raise TypeError('Does not implement dict-like functionality.')
         except Exception as e:
             raise Invalid(node,
-                          _('"${val}" is not a mapping type: ${err}',
+                          _lazy('"${val}" is not a mapping type: ${err}',
                           mapping = {'val':value, 'err':e})
                           )
 
@@ -679,15 +1201,27 @@ class Mapping(SchemaType):
             children.append(subval)
         return children
 
-    def _impl(self, node, value, callback):
-        value = self._validate(node, value)
+    def _impl(self, node, value, callback, fail_fast=False):
+        names = None
+        if type(value) is dict:
+            names = _child_names(node)
+        if names is None:
+            value = self._validate(node, value)
+            lookup = value.pop # the keys left are unknown
+        else:
+            lookup = value.get
+        if self.unknown != 'ignore':
+            known = _child_name_set(node)
+            if self.unknown == 'raise' and not known.issuperset(value):
+                # reject unknown keys before deserializing any child
+                _raise_unknown(node, _unknown_items(value, known))
 
         error = None
         result = {}
 
         for num, subnode in enumerate(node.children):
             name = subnode.name
-            subval = value.pop(name, null)
+            subval = lookup(name, null)
             if subval is drop or (subval is null and subnode.default is drop):
                 continue
             try:
@@ -696,20 +1230,17 @@ class Mapping(SchemaType):
                 if error is None:
                     error = Invalid(node)
                 error.add(e, num)
+                if fail_fast:
+                    raise error
             else:
                 if sub_result is drop:
                     continue
                 result[name] = sub_result
 
-        if self.unknown == 'raise':
-            if value:
-                raise UnsupportedFields(
-                    node, value,
-                    msg=_('Unrecognized keys in mapping: "${val}"',
-                          mapping={'val': value}))
-
-        elif self.unknown == 'preserve':
-            result.update(copy.deepcopy(value))
+        if self.unknown == 'preserve':
+            if names is not None:
+                value = _unknown_items(value, known)
+            _preserve_unknown(self.copy_unknown, value, result)
 
         if error is not None:
             raise error
@@ -725,14 +1256,56 @@ class Mapping(SchemaType):
 
         return self._impl(node, appstruct, callback)
 
-    def deserialize(self, node, cstruct):
+    def deserialize(self, node, cstruct, fail_fast=False):
+        """
+        Along with the normal ``node`` and ``cstruct`` arguments, this
+        method accepts an additional optional keyword argument:
+        ``fail_fast``.  If it is true, deserialization stops at the first
+        invalid child; see :meth:`colander.SchemaNode.deserialize`.
+        """
         if cstruct is null:
             return null
 
-        def callback(subnode, subcstruct):
-            return subnode.deserialize(subcstruct)
+        if fail_fast:
+            callback = _deserialize_fail_fast
+        else:
+            def callback(subnode, subcstruct):
+                return subnode.deserialize(subcstruct)
+
+        return self._impl(node, cstruct, callback, fail_fast)
+
+    def validate(self, node, cstruct):
+        """ Raise the :exc:`colander.Invalid` exception ``deserialize``
+        would raise for ``cstruct``, if any, without building the
+        deserialized mapping: a ``dict`` cstruct is not copied, the children
+        are checked with :meth:`colander.SchemaNode.validate`, and
+        preserved unknown keys are not copied either.  ``cstruct`` must not
+        be :attr:`colander.null`."""
+        if isinstance(cstruct, dict):
+            value = cstruct
+        else:
+            value = self._validate(node, cstruct)
+
+        error = None
 
-        return self._impl(node, cstruct, callback)
+        for num, subnode in enumerate(node.children):
+            subval = value.get(subnode.name, null)
+            if subval is drop or (subval is null and subnode.default is drop):
+                continue
+            try:
+                _validate_child(subnode, subval)
+            except Invalid as e:
+                if error is None:
+                    error = Invalid(node)
+                error.add(e, num)
+
+        if self.unknown == 'raise':
+            names = frozenset(subnode.name for subnode in node.children)
+            if not names.issuperset(value):
+                _raise_unknown(node, _unknown_items(value, names))
+
+        if error is not None:
+            raise error
 
     def flatten(self, node, appstruct, prefix='', listitem=False):
         result = {}
@@ -773,6 +1346,47 @@ class Mapping(SchemaType):
         return appstruct[path]
 
 
+def _child_names(node):
+    # the name -> position index of the children of node, or None if two
+    # children share a name: the first one gets the value of the name and
+    # the others get null, so the keys of the cstruct are popped from a copy
+    if isinstance(node, _SchemaNode):
+        index = node._child_index()
+    else:
+        index = {}
+        for pos, child in enumerate(node.children):
+            index.setdefault(child.name, pos)
+    if len(index) != len(node.children):
+        return None
+    return index
+
+def _child_name_set(node):
+    # the names of the children of node as a frozenset
+    if isinstance(node, _SchemaNode):
+        return node._child_name_set()
+    return frozenset(child.name for child in node.children)
+
+def _unknown_items(value, names):
+    # the items of the mapping value whose key is not in the set names
+    if names.issuperset(value):
+        return {}
+    return dict((name, subval) for name, subval in value.items()
+                if name not in names)
+
+def _raise_unknown(node, unknown):
+    raise UnsupportedFields(
+        node, unknown,
+        msg=_lazy('Unrecognized keys in mapping: "${val}"',
+                  mapping={'val': unknown}))
+
+def _preserve_unknown(copy_unknown, unknown, result):
+    # add the items of the cstruct which are not the values of children to
+    # the result of a mapping type whose ``unknown`` policy is 'preserve'
+    if unknown:
+        if copy_unknown:
+            unknown = copy.deepcopy(unknown)
+        result.update(unknown)
+
 class Positional(object):
     """
     Marker abstract base class meaning 'this type has children which
@@ -800,7 +1414,7 @@ class Tuple(Positional, SchemaType):
         if not hasattr(value, '__iter__'):
             raise Invalid(
                 node,
-                _('"${val}" is not iterable', mapping={'val':value})
+                _lazy('"${val}" is not iterable', mapping={'val':value})
                 )
 
         valuelen, nodelen = len(value), len(node.children)
@@ -808,9 +1422,9 @@ class Tuple(Positional, SchemaType):
         if valuelen != nodelen:
             raise Invalid(
                 node,
-                _('"${val}" has an incorrect number of elements '
-                  '(expected ${exp}, was ${was})',
-                  mapping={'val':value, 'exp':nodelen, 'was':valuelen})
+                _lazy('"${val}" has an incorrect number of elements '
+                      '(expected ${exp}, was ${was})',
+                      mapping={'val':value, 'exp':nodelen, 'was':valuelen})
                 )
 
         return list(value)
@@ -831,7 +1445,7 @@ class Tuple(Positional, SchemaType):
             cstruct = list(cstruct)
         return cstruct
 
-    def _impl(self, node, value, callback):
+    def _impl(self, node, value, callback, fail_fast=False):
         value = self._validate(node, value)
         error = None
         result = []
@@ -844,6 +1458,8 @@ class Tuple(Positional, SchemaType):
                 if error is None:
                     error = Invalid(node)
                 error.add(e, num)
+                if fail_fast:
+                    raise error
 
         if error is not None:
             raise error
@@ -859,14 +1475,43 @@ class Tuple(Positional, SchemaType):
 
         return self._impl(node, appstruct, callback)
 
-    def deserialize(self, node, cstruct):
+    def deserialize(self, node, cstruct, fail_fast=False):
+        """
+        Along with the normal ``node`` and ``cstruct`` arguments, this
+        method accepts an additional optional keyword argument:
+        ``fail_fast``.  If it is true, deserialization stops at the first
+        invalid child; see :meth:`colander.SchemaNode.deserialize`.
+        """
         if cstruct is null:
             return null
 
-        def callback(subnode, subval):
-            return subnode.deserialize(subval)
+        if fail_fast:
+            callback = _deserialize_fail_fast
+        else:
+            def callback(subnode, subval):
+                return subnode.deserialize(subval)
+
+        return self._impl(node, cstruct, callback, fail_fast)
+
+    def validate(self, node, cstruct):
+        """ Raise the :exc:`colander.Invalid` exception ``deserialize``
+        would raise for ``cstruct``, if any, without building the
+        deserialized tuple; the children are checked with
+        :meth:`colander.SchemaNode.validate`.  ``cstruct`` must not be
+        :attr:`colander.null`."""
+        value = self._validate(node, cstruct)
+        error = None
 
-        return self._impl(node, cstruct, callback)
+        for num, subnode in enumerate(node.children):
+            try:
+                _validate_child(subnode, value[num])
+            except Invalid as e:
+                if error is None:
+                    error = Invalid(node)
+                error.add(e, num)
+
+        if error is not None:
+            raise error
 
     def flatten(self, node, appstruct, prefix='', listitem=False):
         result = {}
@@ -894,11 +1539,8 @@ class Tuple(Positional, SchemaType):
             next_name, rest = path.split('.', 1)
         else:
             next_name, rest = path, None
-        for index, next_node in enumerate(node.children):
-            if next_node.name == next_name:
-                break
-        else:
-            raise KeyError(next_name)
+        index = _child_position(node, next_name)
+        next_node = node.children[index]
         if rest is not None:
             next_appstruct = appstruct[index]
             appstruct[index] = next_node.typ.set_value(
@@ -912,11 +1554,8 @@ class Tuple(Positional, SchemaType):
             name, rest = path.split('.', 1)
         else:
             name, rest = path, None
-        for index, next_node in enumerate(node.children):
-            if next_node.name == name:
-                break
-        else:
-            raise KeyError(name)
+        index = _child_position(node, name)
+        next_node = node.children[index]
         if rest is not None:
             return next_node.typ.get_value(next_node, appstruct[index], rest)
         return appstruct[index]
@@ -947,7 +1586,8 @@ class Set(SchemaType):
         if not is_nonstr_iter(cstruct):
             raise Invalid(
                 node,
-                _('${cstruct} is not iterable', mapping={'cstruct': cstruct})
+                _lazy('${cstruct} is not iterable',
+                      mapping={'cstruct': cstruct})
             )
 
         return set(cstruct)
@@ -978,7 +1618,8 @@ class List(SchemaType):
         if not is_nonstr_iter(cstruct):
             raise Invalid(
                 node,
-                _('${cstruct} is not iterable', mapping={'cstruct': cstruct})
+                _lazy('${cstruct} is not iterable',
+                      mapping={'cstruct': cstruct})
             )
 
         return list(cstruct)
@@ -1031,8 +1672,8 @@ class Sequence(Positional, SchemaType):
         if accept_scalar:
             return [value]
         else:
-            raise Invalid(node, _('"${val}" is not iterable',
-                                  mapping={'val':value})
+            raise Invalid(node, _lazy('"${val}" is not iterable',
+                                      mapping={'val':value})
                          )
 
     def cstruct_children(self, node, cstruct):
@@ -1040,7 +1681,7 @@ class Sequence(Positional, SchemaType):
             return SequenceItems([])
         return SequenceItems(cstruct)
 
-    def _impl(self, node, value, callback, accept_scalar):
+    def _impl(self, node, value, callback, accept_scalar, fail_fast=False):
         if accept_scalar is None:
             accept_scalar = self.accept_scalar
 
@@ -1059,6 +1700,8 @@ class Sequence(Positional, SchemaType):
                 if error is None:
                     error = Invalid(node)
                 error.add(e, num)
+                if fail_fast:
+                    raise error
             else:
                 if sub_result is drop:
                     continue
@@ -1097,12 +1740,12 @@ class Sequence(Positional, SchemaType):
 
         return self._impl(node, appstruct, callback, accept_scalar)
 
-    def deserialize(self, node, cstruct, accept_scalar=None):
+    def deserialize(self, node, cstruct, accept_scalar=None, fail_fast=False):
         """
         Along with the normal ``node`` and ``cstruct`` arguments, this
-        method accepts an additional optional keyword argument:
-        ``accept_scalar``.  This keyword argument can be used to
-        override the constructor value of the same name.
+        method accepts additional optional keyword arguments:
+        ``accept_scalar`` and ``fail_fast``.  ``accept_scalar`` can be
+        used to override the constructor value of the same name.
 
         If ``accept_scalar`` is ``True`` and the ``cstruct`` does not
         have an ``__iter__`` method or is a mapping type, the value
@@ -1116,14 +1759,90 @@ class Sequence(Positional, SchemaType):
         The default of ``accept_scalar`` is ``None``, which means
         respect the default ``accept_scalar`` value attached to this
         instance via its constructor.
+
+        If ``fail_fast`` is true, deserialization stops at the first
+        invalid item; see :meth:`colander.SchemaNode.deserialize`.
         """
         if cstruct is null:
             return null
 
-        def callback(subnode, subcstruct):
-            return subnode.deserialize(subcstruct)
+        if fail_fast:
+            callback = _deserialize_fail_fast
+        else:
+            def callback(subnode, subcstruct):
+                return subnode.deserialize(subcstruct)
+
+        return self._impl(node, cstruct, callback, accept_scalar, fail_fast)
+
+    def validate(self, node, cstruct):
+        """ Raise the :exc:`colander.Invalid` exception ``deserialize``
+        would raise for ``cstruct``, if any, without building the
+        deserialized list: a ``list`` or ``tuple`` cstruct is not copied and
+        the items are checked with :meth:`colander.SchemaNode.validate`.
+        ``cstruct`` must not be :attr:`colander.null`."""
+        if isinstance(cstruct, (list, tuple)):
+            value = cstruct
+        else:
+            value = self._validate(node, cstruct, self.accept_scalar)
+
+        error = None
 
-        return self._impl(node, cstruct, callback, accept_scalar)
+        subnode = node.children[0]
+        for num, subval in enumerate(value):
+            if subval is drop or (subval is null and subnode.default is drop):
+                continue
+            try:
+                _validate_child(subnode, subval)
+            except Invalid as e:
+                if error is None:
+                    error = Invalid(node)
+                error.add(e, num)
+
+        if error is not None:
+            raise error
+
+    def iter_deserialize(self, node, cstruct, accept_scalar=None):
+        """
+        Lazily deserialize the items of ``cstruct``, which may be any
+        iterable, including a generator, and yield an ``(index, result)``
+        pair for each of them, where ``result`` is either the item's
+        appstruct or a :exc:`colander.Invalid` error for ``node`` holding
+        the item's error at position ``index``, as ``deserialize`` would
+        have reported it.  Items are pulled from ``cstruct`` one at a time
+        and are not accumulated, so memory use does not depend on the
+        number of items.  Dropped items are skipped.
+
+        ``accept_scalar`` has the same meaning as for ``deserialize``.  If
+        ``cstruct`` is :attr:`colander.null`, nothing is yielded; if it is
+        not iterable (and not accepted as a scalar), an
+        :exc:`colander.Invalid` error is raised.
+        """
+        if cstruct is null:
+            return
+        if accept_scalar is None:
+            accept_scalar = self.accept_scalar
+        if not (hasattr(cstruct, '__iter__') and
+                not hasattr(cstruct, 'get') and
+                not isinstance(cstruct, string_types)):
+            cstruct = self._validate(node, cstruct, accept_scalar)
+
+        subnode = node.children[0]
+        drop_default = subnode.default is drop
+        deserialize = _compile_node(subnode)
+
+        for num, subval in enumerate(cstruct):
+            if subval is drop or (subval is null and drop_default):
+                continue
+            try:
+                sub_result = deserialize(subval)
+            except Invalid as e:
+                error = Invalid(node)
+                error.add(e, num)
+                yield num, error
+            else:
+                if sub_result is drop:
+                    continue
+                yield num, sub_result
 
     def flatten(self, node, appstruct, prefix='', listitem=False):
         result = {}
@@ -1179,6 +1898,31 @@ class Sequence(Positional, SchemaType):
 
 Seq = Sequence
 
+_flatten_kinds = {
+    SchemaType.__dict__['flatten']: 'leaf',
+    Mapping.__dict__['flatten']: 'mapping',
+    Tuple.__dict__['flatten']: 'tuple',
+    Sequence.__dict__['flatten']: 'sequence',
+    }
+
+_value_kinds = {
+    SchemaType.__dict__['get_value']: 'leaf',
+    SchemaType.__dict__['set_value']: 'leaf',
+    Mapping.__dict__['get_value']: 'mapping',
+    Mapping.__dict__['set_value']: 'mapping',
+    Tuple.__dict__['get_value']: 'tuple',
+    Tuple.__dict__['set_value']: 'tuple',
+    Sequence.__dict__['get_value']: 'sequence',
+    Sequence.__dict__['set_value']: 'sequence',
+    }
+
+_unflatten_kinds = {
+    SchemaType.__dict__['unflatten']: 'leaf',
+    Mapping.__dict__['unflatten']: 'mapping',
+    Tuple.__dict__['unflatten']: 'tuple',
+    Sequence.__dict__['unflatten']: 'sequence',
+    }
+
 class String(SchemaType):
     """ A type representing a Unicode string.
 
@@ -1265,8 +2009,8 @@ class String(SchemaType):
             return result
         except Exception as e:
             raise Invalid(node,
-                          _('${val} cannot be serialized: ${err}',
-                            mapping={'val':appstruct, 'err':e})
+                          _lazy('${val} cannot be serialized: ${err}',
+                                mapping={'val':appstruct, 'err':e})
                           )
     def deserialize(self, node, cstruct):
         if cstruct == '' and self.allow_empty:
@@ -1286,8 +2030,8 @@ class String(SchemaType):
                 raise Invalid(node)
         except Exception as e:
             raise Invalid(node,
-                          _('${val} is not a string: ${err}',
-                            mapping={'val':cstruct, 'err':e}))
+                          _lazy('${val} is not a string: ${err}',
+                                mapping={'val':cstruct, 'err':e}))
 
         return result
 
@@ -1306,8 +2050,8 @@ class Number(SchemaType):
             return str(self.num(appstruct))
         except Exception:
             raise Invalid(node,
-                          _('"${val}" is not a number',
-                            mapping={'val':appstruct}),
+                          _lazy('"${val}" is not a number',
+                                mapping={'val':appstruct}),
                           )
     def deserialize(self, node, cstruct):
         if cstruct != 0 and not cstruct:
@@ -1317,8 +2061,8 @@ class Number(SchemaType):
             return self.num(cstruct)
         except Exception:
             raise Invalid(node,
-                          _('"${val}" is not a number',
-                            mapping={'val':cstruct})
+                          _lazy('"${val}" is not a number',
+                                mapping={'val':cstruct})
                           )
 
 class Integer(Number):
@@ -1347,7 +2091,7 @@ class Float(Number):
     """
     num = float
 
-class Decimal(Number):
+class Decimal(_CachedDeserialization, Number):
     """
     A type representing a decimal floating point.  Deserialization returns an
     instance of the Python ``decimal.Decimal`` type.
@@ -1367,16 +2111,26 @@ class Decimal(Number):
     the serialized and deserialized result will be normalized by stripping
     the rightmost trailing zeros.
 
+    The constructor also accepts a ``cache_size`` argument.  If it is
+    supplied, up to ``cache_size`` deserialized amounts are kept in a
+    :class:`colander.ConversionCache`, available as the ``cache``
+    attribute of the type, and a repeated cstruct is not parsed again.
+
     The subnodes of the :class:`colander.SchemaNode` that wraps
     this type are ignored.
     """
-    def __init__(self, quant=None, rounding=None, normalize=False):
+    _immutable = (decimal.Decimal,)
+    _deserialize = Number.deserialize
+
+    def __init__(self, quant=None, rounding=None, normalize=False,
+                 cache_size=None):
         if quant is None:
             self.quant = None
         else:
             self.quant = decimal.Decimal(quant)
         self.rounding = rounding
         self.normalize = normalize
+        self._init_cache(cache_size)
 
     def num(self, val):
         result = decimal.Decimal(str(val))
@@ -1398,13 +2152,17 @@ class Money(Decimal):
     method of this class, the :attr:`colander.null` value will be
     returned.
 
+    Like :class:`colander.Decimal`, the constructor accepts a
+    ``cache_size`` argument.
+
     The subnodes of the :class:`colander.SchemaNode` that wraps
     this type are ignored.
     """
-    def __init__(self):
-        super(Money, self).__init__(decimal.Decimal('.01'), decimal.ROUND_UP)
+    def __init__(self, cache_size=None):
+        super(Money, self).__init__(decimal.Decimal('.01'), decimal.ROUND_UP,
+                                    cache_size=cache_size)
 
-class Boolean(SchemaType):
+class Boolean(_CachedDeserialization, SchemaType):
     """ A type representing a boolean object.
 
     The constructor accepts these keyword arguments:
@@ -1421,6 +2179,10 @@ class Boolean(SchemaType):
     - ``true_val``: The value returned on serialization of a True
       value.
 
+    - ``cache_size``: If supplied, up to this number of deserialized
+      values are kept in a :class:`colander.ConversionCache`, available
+      as the ``cache`` attribute of the type.
+
     During deserialization, a value contained in :attr:`false_choices`,
     will be considered ``False``.
 
@@ -1440,8 +2202,10 @@ class Boolean(SchemaType):
     The subnodes of the :class:`colander.SchemaNode` that wraps
     this type are ignored.
     """
+    _immutable = (bool,)
+
     def __init__(self, false_choices=('false', '0'), true_choices=(),
-                 false_val='false', true_val='true'):
+                 false_val='false', true_val='true', cache_size=None):
 
         self.false_choices = false_choices
         self.true_choices = true_choices
@@ -1450,6 +2214,7 @@ class Boolean(SchemaType):
 
         self.true_reprs = ', '.join([repr(c) for c in self.true_choices])
         self.false_reprs = ', '.join([repr(c) for c in self.false_choices])
+        self._init_cache(cache_size)
 
     def serialize(self, node, appstruct):
         if appstruct is null:
@@ -1457,7 +2222,7 @@ class Boolean(SchemaType):
 
         return appstruct and self.true_val or self.false_val
 
-    def deserialize(self, node, cstruct):
+    def _deserialize(self, node, cstruct):
         if cstruct is null:
             return null
 
@@ -1465,7 +2230,8 @@ class Boolean(SchemaType):
             result = str(cstruct)
         except:
             raise Invalid(node,
-                          _('${val} is not a string', mapping={'val':cstruct})
+                          _lazy('${val} is not a string',
+                                mapping={'val':cstruct})
                           )
         result = result.lower()
 
@@ -1476,11 +2242,12 @@ class Boolean(SchemaType):
                 return True
             else:
                 raise Invalid(node,
-                              _('"${val}" is neither in (${false_choices}) '
-                                'nor in (${true_choices})',
-                                mapping={'val':cstruct,
-                                         'false_choices': self.false_reprs,
-                                         'true_choices': self.true_reprs })
+                              _lazy('"${val}" is neither in '
+                                    '(${false_choices}) '
+                                    'nor in (${true_choices})',
+                                    mapping={'val':cstruct,
+                                             'false_choices': self.false_reprs,
+                                             'true_choices': self.true_reprs })
                               )
 
         return True
@@ -1503,9 +2270,15 @@ class GlobalObject(SchemaType):
       using a '.' e.g. ``package.module.attr``.
 
     These styles can be used interchangeably.  If the serialization
-    contains a ``:`` (colon), the ``pkg_resources`` resolution
-    mechanism will be chosen, otherwise the ``zope.dottedname``
-    resolution mechanism will be chosen.
+    contains a ``:`` (colon), the ``pkg_resources``-style resolution
+    will be chosen, otherwise the ``zope.dottedname``-style resolution
+    will be chosen.  Neither style requires ``pkg_resources`` or
+    ``zope.dottedname`` to be installed.
+
+    Resolved objects are kept in a cache shared by all the instances of
+    this type, keyed by type, ``package`` and dotted name, so a dotted name
+    is only imported and walked once.  Call :meth:`clear_cache` after
+    reloading a module to resolve its names again.
 
     The constructor accepts a single argument named ``package`` which
     should be a Python module or package object; it is used when
@@ -1526,25 +2299,39 @@ class GlobalObject(SchemaType):
     The subnodes of the :class:`colander.SchemaNode` that wraps
     this type are ignored.
     """
+    # resolved objects, keyed by (type, package, dotted name), as
+    # subclasses may resolve names differently
+    _resolved = ConversionCache(1024)
+
     def __init__(self, package):
         self.package = package
 
+    @classmethod
+    def clear_cache(cls):
+        """ Forget all the objects resolved by instances of this type. """
+        cls._resolved.clear()
+
     def _pkg_resources_style(self, node, value):
         """ package.module:attr style """
-        import pkg_resources
         if value.startswith('.') or value.startswith(':'):
             if not self.package:
                 raise Invalid(
                     node,
-                    _('relative name "${val}" irresolveable without package',
-                      mapping={'val':value})
+                    _lazy('relative name "${val}" irresolveable without '
+                          'package', mapping={'val':value})
                     )
             if value in ['.', ':']:
                 value = self.package.__name__
             else:
                 value = self.package.__name__ + value
-        return pkg_resources.EntryPoint.parse(
-            'x=%s' % value).load(False)
+        module, _sep, attrs = value.partition(':')
+        found = importlib.import_module(module)
+        for attr in attrs.split('.') if attrs else ():
+            try:
+                found = getattr(found, attr)
+            except AttributeError:
+                raise ImportError('%r has no %r attribute' % (found, attr))
+        return found
 
     def _zope_dottedname_style(self, node, value):
         """ package.module.attr style """
@@ -1553,8 +2340,8 @@ class GlobalObject(SchemaType):
             if self.package is None:
                 raise Invalid(
                     node,
-                    _('relative name "${val}" irresolveable without package',
-                      mapping={'val':value})
+                    _lazy('relative name "${val}" irresolveable without '
+                          'package', mapping={'val':value})
                     )
             name = module.split('.')
         else:
@@ -1563,8 +2350,8 @@ class GlobalObject(SchemaType):
                 if module is None:
                     raise Invalid(
                         node,
-                        _('relative name "${val}" irresolveable without '
-                          'package', mapping={'val':value})
+                        _lazy('relative name "${val}" irresolveable without '
+                              'package', mapping={'val':value})
                         )
                 module = module.split('.')
                 name.pop(0)
@@ -1597,8 +2384,8 @@ class GlobalObject(SchemaType):
             
         except AttributeError:
             raise Invalid(node,
-                          _('"${val}" has no __name__',
-                            mapping={'val':appstruct})
+                          _lazy('"${val}" has no __name__',
+                                mapping={'val':appstruct})
                           )
     def deserialize(self, node, cstruct):
         if not cstruct:
@@ -1606,19 +2393,88 @@ class GlobalObject(SchemaType):
 
         if not isinstance(cstruct, string_types):
             raise Invalid(node,
-                          _('"${val}" is not a string',
-                            mapping={'val':cstruct}))
+                          _lazy('"${val}" is not a string',
+                                mapping={'val':cstruct}))
+        key = (type(self), self.package, cstruct)
+        found = self._resolved.get(key, _no_result)
+        if found is not _no_result:
+            return found
         try:
             if ':' in cstruct:
-                return self._pkg_resources_style(node, cstruct)
+                found = self._pkg_resources_style(node, cstruct)
             else:
-                return self._zope_dottedname_style(node, cstruct)
+                found = self._zope_dottedname_style(node, cstruct)
         except ImportError:
             raise Invalid(node,
-                          _('The dotted name "${name}" cannot be imported',
-                            mapping={'name':cstruct}))
+                          _lazy('The dotted name "${name}" cannot be imported',
+                                mapping={'name':cstruct}))
+        self._resolved.set(key, found)
+        return found
+
+# The canonical ISO 8601 shapes which ``datetime.fromisoformat`` (Python
+# 3.7+) parses exactly like ``iso8601.parse_date`` does: a date, optionally
+# followed by a time with an optional fraction of 3 or 6 digits and an
+# optional UTC designator or offset.  Any other shape, and any value out of
+# range, is left to the iso8601 library, so that errors stay the same.
+_ISO_DATETIME = re.compile(
+    r'[0-9]{4}-[0-9]{2}-[0-9]{2}'
+    r'(?:[T ][0-9]{2}:[0-9]{2}(?::[0-9]{2}(?:\.[0-9]{3}(?:[0-9]{3})?)?)?'
+    r'(Z|[-+][0-9]{2}:[0-9]{2})?)?\Z')
+_ISO_TIME = re.compile(r'[0-9]{2}:[0-9]{2}(?::[0-9]{2})?\Z')
+_fromisoformat = getattr(datetime.datetime, 'fromisoformat', None)
+_iso_timezones = {}
+
+def _iso8601():
+    # the iso8601 library takes longer to import than the rest of colander,
+    # so it is imported on first use
+    from iso8601 import iso8601
+    return iso8601
+
+def _iso_timezone(designator):
+    tz = _iso_timezones.get(designator)
+    if tz is None:
+        if designator == 'Z':
+            tz = _iso8601().UTC
+        else:
+            hours, minutes = int(designator[1:3]), int(designator[4:6])
+            if designator[0] == '-':
+                hours, minutes = -hours, -minutes
+            tz = _iso8601().FixedOffset(hours, minutes, designator)
+        _iso_timezones[designator] = tz
+    return tz
+
+def _parse_datetime(value, default_tzinfo=_marker):
+    # iso8601.parse_date, with a fast path for the canonical shapes; the
+    # default tzinfo is UTC
+    if default_tzinfo is _marker:
+        default_tzinfo = _iso_timezone('Z')
+    if _fromisoformat is not None and isinstance(value, string_types):
+        match = _ISO_DATETIME.match(value)
+        if match is not None:
+            designator = match.group(1)
+            try:
+                if designator is None:
+                    result = _fromisoformat(value)
+                    if default_tzinfo is not None:
+                        result = result.replace(tzinfo=default_tzinfo)
+                    return result
+                return _fromisoformat(value[:match.start(1)]).replace(
+                    tzinfo=_iso_timezone(designator))
+            except ValueError:
+                pass # out of range: let iso8601 report it
+    return _iso8601().parse_date(value, default_timezone=default_tzinfo)
 
-class DateTime(SchemaType):
+def _parse_time(value):
+    # the time of a canonical "HH:MM:SS" or "HH:MM" value, None otherwise
+    if (_fromisoformat is not None and isinstance(value, string_types) and
+        _ISO_TIME.match(value) is not None):
+        try:
+            return datetime.time.fromisoformat(value)
+        except ValueError:
+            pass # out of range: let strptime report it
+    return None
+
+class DateTime(_CachedDeserialization, SchemaType):
     """ A type representing a Python ``datetime.datetime`` object.
 
     This type serializes python ``datetime.datetime`` objects to a
@@ -1634,6 +2490,11 @@ class DateTime(SchemaType):
     If ``default_tzinfo`` is explicitly set to ``None`` then no default
     tzinfo will be applied to naive datetimes.
 
+    The constructor also accepts a ``cache_size`` argument.  If it is
+    supplied, up to ``cache_size`` deserialized datetimes are kept in a
+    :class:`colander.ConversionCache`, available as the ``cache``
+    attribute of the type, and a repeated timestamp is not parsed again.
+
     You can adjust the error message reported by this class by
     changing its ``err_template`` attribute in a subclass on an
     instance of this class.  By default, the ``err_template``
@@ -1664,9 +2525,13 @@ class DateTime(SchemaType):
     this type are ignored.
     """
     err_template =  _('Invalid date')
+    _immutable = (datetime.datetime,)
 
-    def __init__(self, default_tzinfo=iso8601.UTC):
+    def __init__(self, default_tzinfo=_marker, cache_size=None):
+        if default_tzinfo is _marker:
+            default_tzinfo = _iso_timezone('Z')
         self.default_tzinfo = default_tzinfo
+        self._init_cache(cache_size)
 
     def serialize(self, node, appstruct):
         if not appstruct:
@@ -1677,34 +2542,36 @@ class DateTime(SchemaType):
 
         if not isinstance(appstruct, datetime.datetime):
             raise Invalid(node,
-                          _('"${val}" is not a datetime object',
-                            mapping={'val':appstruct})
+                          _lazy('"${val}" is not a datetime object',
+                                mapping={'val':appstruct})
                           )
 
         if appstruct.tzinfo is None:
             appstruct = appstruct.replace(tzinfo=self.default_tzinfo)
         return appstruct.isoformat()
 
-    def deserialize(self, node, cstruct):
+    def _deserialize(self, node, cstruct):
         if not cstruct:
             return null
 
         try:
-            result = iso8601.parse_date(
-                cstruct, default_timezone=self.default_tzinfo)
-        except iso8601.ParseError as e:
-            raise Invalid(node, _(self.err_template,
-                                  mapping={'val':cstruct, 'err':e}))
+            result = _parse_datetime(cstruct, self.default_tzinfo)
+        except _iso8601().ParseError as e:
+            raise Invalid(node, _lazy(self.err_template,
+                                      mapping={'val':cstruct, 'err':e}))
         return result
 
-class Date(SchemaType):
+class Date(_CachedDeserialization, SchemaType):
     """ A type representing a Python ``datetime.date`` object.
 
     This type serializes python ``datetime.date`` objects to a
     `ISO8601 <https://en.wikipedia.org/wiki/ISO_8601>`_ string format.
     The format includes the date only.
 
-    The constructor accepts no arguments.
+    The constructor accepts a ``cache_size`` argument.  If it is
+    supplied, up to ``cache_size`` deserialized dates are kept in a
+    :class:`colander.ConversionCache`, available as the ``cache``
+    attribute of the type, and a repeated date is not parsed again.
 
     You can adjust the error message reported by this class by
     changing its ``err_template`` attribute in a subclass on an
@@ -1738,6 +2605,10 @@ class Date(SchemaType):
     """
 
     err_template =  _('Invalid date')
+    _immutable = (datetime.date,)
+
+    def __init__(self, cache_size=None):
+        self._init_cache(cache_size)
 
     def serialize(self, node, appstruct):
         if not appstruct:
@@ -1748,22 +2619,22 @@ class Date(SchemaType):
 
         if not isinstance(appstruct, datetime.date):
             raise Invalid(node,
-                          _('"${val}" is not a date object',
-                            mapping={'val':appstruct})
+                          _lazy('"${val}" is not a date object',
+                                mapping={'val':appstruct})
                           )
 
         return appstruct.isoformat()
 
-    def deserialize(self, node, cstruct):
+    def _deserialize(self, node, cstruct):
         if not cstruct:
             return null
         try:
-            result = iso8601.parse_date(cstruct)
+            result = _parse_datetime(cstruct)
             result = result.date()
-        except iso8601.ParseError as e:
+        except _iso8601().ParseError as e:
             raise Invalid(node,
-                          _(self.err_template,
-                            mapping={'val':cstruct, 'err':e})
+                          _lazy(self.err_template,
+                                mapping={'val':cstruct, 'err':e})
                           )
         return result
 
@@ -1819,8 +2690,8 @@ class Time(SchemaType):
             if not appstruct:
                 return null
             raise Invalid(node,
-                          _('"${val}" is not a time object',
-                            mapping={'val':appstruct})
+                          _lazy('"${val}" is not a time object',
+                                mapping={'val':appstruct})
                           )
 
         return appstruct.isoformat().split('.')[0]
@@ -1828,10 +2699,13 @@ class Time(SchemaType):
     def deserialize(self, node, cstruct):
         if not cstruct:
             return null
+        result = _parse_time(cstruct)
+        if result is not None:
+            return result
         try:
-            result = iso8601.parse_date(cstruct)
+            result = _parse_datetime(cstruct)
             result = result.time()
-        except (iso8601.ParseError, TypeError):
+        except (_iso8601().ParseError, TypeError):
             try:
                 result = timeparse(cstruct, '%H:%M:%S')
             except ValueError:
@@ -1839,15 +2713,15 @@ class Time(SchemaType):
                     result = timeparse(cstruct, '%H:%M')
                 except Exception as e:
                     raise Invalid(node,
-                                  _(self.err_template,
-                                    mapping={'val':cstruct, 'err':e})
+                                  _lazy(self.err_template,
+                                        mapping={'val':cstruct, 'err':e})
                                   )
         return result
 
 def timeparse(t, format):
     return datetime.datetime(*time.strptime(t, format)[0:6]).time()
 
-class Enum(SchemaType):
+class Enum(_CachedDeserialization, SchemaType):
     """A type representing a Python ``enum.Enum`` object.
 
     The constructor accepts three arguments named ``enum_cls``, ``attr``,
@@ -1863,9 +2737,16 @@ class Enum(SchemaType):
     ``typ`` is an optional argument, and it should be an instance of
     ``colander.SchemaType``.  This argument represents the cstruct's type.
     If ``typ`` is not specified, a plain ``colander.String`` is used.
+
+    ``cache_size`` is an optional argument.  If it is supplied, up to
+    ``cache_size`` deserialized members are kept in a
+    :class:`colander.ConversionCache`, available as the ``cache``
+    attribute of the type, and a repeated cstruct is not looked up again.
     """
+    _immutable = (enum.Enum,)
 
-    def __init__(self, enum_cls, attr=None, typ=None):
+    def __init__(self, enum_cls, attr=None, typ=None, cache_size=None):
+        self._init_cache(cache_size)
         self.enum_cls = enum_cls
         self.attr = 'name' if attr is None else attr
         self.typ = String() if typ is None else typ
@@ -1884,30 +2765,51 @@ class Enum(SchemaType):
             return null
 
         if not isinstance(appstruct, self.enum_cls):
-            raise Invalid(node, _('"${val}" is not a valid "${cls}"',
-                                  mapping={'val': appstruct,
-                                           'cls': self.enum_cls.__name__}))
+            raise Invalid(node, _lazy('"${val}" is not a valid "${cls}"',
+                                      mapping={'val': appstruct,
+                                               'cls': self.enum_cls.__name__}))
 
         return self.typ.serialize(node, getattr(appstruct, self.attr))
 
-    def deserialize(self, node, cstruct):
+    def _deserialize(self, node, cstruct):
         result = self.typ.deserialize(node, cstruct)
         if result is null:
             return null
 
         if result not in self.values:
-            raise Invalid(node, _('"${val}" is not a valid "${cls}"',
-                                  mapping={'val': cstruct,
-                                           'cls': self.enum_cls.__name__}))
+            raise Invalid(node, _lazy('"${val}" is not a valid "${cls}"',
+                                      mapping={'val': cstruct,
+                                               'cls': self.enum_cls.__name__}))
         return self.values[result]
 
+def _child_position(node, name):
+    """ Return the position of the first child of ``node`` named ``name``,
+    or raise a :exc:`KeyError` if there is no such child.  Uses the name
+    index of schema nodes, and a scan of ``children`` for other node-like
+    objects. """
+    if isinstance(node, _SchemaNode):
+        pos = node._position(name)
+        if pos is None:
+            raise KeyError(name)
+        return pos
+    for pos, child in enumerate(node.children):
+        if child.name == name:
+            return pos
+    raise KeyError(name)
+
 def _add_node_children(node, children):
+    if not children:
+        return
+    # the names of the children of node, tracked here rather than through
+    # the index of node, which a node being constructed has no use for
+    names = set(child.name for child in node.children)
     for n in children:
         insert_before = getattr(n, 'insert_before', None)
-        exists = node.get(n.name, _marker) is not _marker
+        exists = n.name in names
+        names.add(n.name)
         # use exists for microspeed; we could just call __setitem__
-        # exclusively, but it does an enumeration that's unnecessary in the
-        # common (nonexisting) case (.add is faster)
+        # exclusively, but it replaces the node in place, which is
+        # unnecessary in the common (nonexisting) case (.add is faster)
         if insert_before is None:
             if exists:
                 node[n.name] = n
@@ -2003,6 +2905,11 @@ class _SchemaNode(object):
     object unmolested.
     """
 
+    # _parents holds weak references to the parents of the node (see
+    # _link_parent); it lives outside of __dict__ as it describes this very
+    # node, and is not copied by clones nor pickled
+    __slots__ = ('__dict__', '__weakref__', '_parents')
+
     _counter = itertools.count()
     preparer = None
     validator = None
@@ -2019,19 +2926,24 @@ class _SchemaNode(object):
 
     def __new__(cls, *args, **kw):
         node = object.__new__(cls)
-        node._order = next(cls._counter)
-        node.children = []
+        # a fresh node has nothing to forget: skip __setattr__
+        node.__dict__['_order'] = next(cls._counter)
+        node.__dict__['children'] = _node_list(node, ())
         _add_node_children(node, cls.__all_schema_nodes__)
         return node
 
     def __init__(self, *arg, **kw):
         # bw compat forces us to treat first arg as type if not a _SchemaNode
         if 'typ' in kw:
-            self.typ = kw.pop('typ')
+            typ = kw.pop('typ')
         elif arg and not isinstance(arg[0], _SchemaNode):
-            self.typ, arg = arg[0], arg[1:]
+            typ, arg = arg[0], arg[1:]
+        else:
+            typ = self.schema_type()
+        if isinstance(typ, deferred):
+            self.typ = typ
         else:
-            self.typ = self.schema_type()
+            self.__dict__['typ'] = typ # as in __new__
         _add_node_children(self, arg)
 
         # bw compat forces us to manufacture a title if one is not supplied
@@ -2043,6 +2955,81 @@ class _SchemaNode(object):
             kw['raw_title'] = title
 
         self.__dict__.update(kw)
+        if 'children' in kw:
+            self.__dict__['children'] = _node_list(self, kw['children'])
+        for k, v in kw.items():
+            if isinstance(v, deferred):
+                self.__dict__['_deferred_instance_attrs'] = (
+                    self.__dict__.get('_deferred_instance_attrs', _no_names) |
+                    frozenset(k for k, v in kw.items()
+                              if isinstance(v, deferred)))
+                break
+
+    def __setattr__(self, name, value):
+        attrs = self.__dict__
+        changed = name in _subtree_attrs
+        # keep the registry of deferred attributes up to date; it is
+        # replaced rather than mutated as clones share it
+        deferreds = attrs.get('_deferred_instance_attrs', _no_names)
+        if isinstance(value, deferred):
+            if name not in deferreds:
+                attrs['_deferred_instance_attrs'] = (
+                    deferreds | frozenset([name]))
+                changed = True
+        elif name in deferreds:
+            attrs['_deferred_instance_attrs'] = deferreds - frozenset([name])
+            changed = True
+        if name == 'children':
+            old = attrs.get('children', ())
+            value = _node_list(self, value)
+            object.__setattr__(self, name, value)
+            _children_changed(self, old)
+        else:
+            object.__setattr__(self, name, value)
+            if changed:
+                _node_changed(self, name == 'name')
+
+    def __delattr__(self, name):
+        object.__delattr__(self, name)
+        deferreds = self.__dict__.get('_deferred_instance_attrs', _no_names)
+        if name in deferreds:
+            self.__dict__['_deferred_instance_attrs'] = (
+                deferreds - frozenset([name]))
+            _node_changed(self)
+        elif name in _subtree_attrs:
+            _node_changed(self, name == 'name')
+
+    def __getstate__(self):
+        # the caches derived from the schema hold weak references and
+        # closures; they are worked out again when needed
+        state = self.__dict__.copy()
+        for name in _derived_attrs:
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if 'children' in state:
+            self.__dict__['children'] = _node_list(self, state['children'])
+
+    @property
+    def deferred_attrs(self):
+        """ A sorted tuple of the names of the attributes of this node
+        (not of its children) whose value is a :class:`colander.deferred`,
+        either set on the node itself or defined by its class.  These are
+        the attributes resolved when the node is bound."""
+        return tuple(_deferred_names(self))
+
+    @property
+    def has_deferreds(self):
+        """ ``True`` if this node or any of its descendants has an
+        attribute whose value is a :class:`colander.deferred`, ``False`` if
+        the schema can be used without being bound first.
+
+        The answer is cached for each subtree, and forgotten when the
+        subtree changes, through the attributes of its nodes or their
+        ``children`` lists."""
+        return _bind_state(self)[1]
 
     @staticmethod
     def schema_type():
@@ -2076,12 +3063,19 @@ class _SchemaNode(object):
         If an ``appstruct`` argument is not explicitly provided, it
         defaults to :attr:`colander.null`.
         """
-        if appstruct is null:
-            appstruct = self.default
-        if isinstance(appstruct, deferred): # unbound schema with deferreds
-            appstruct = null
-        cstruct = self.typ.serialize(self, appstruct)
-        return cstruct
+        frame = None
+        if _profiles is not None:
+            frame = _profile_enter(_profiles, self, 'serialize')
+        try:
+            if appstruct is null:
+                appstruct = self.default
+            if isinstance(appstruct, deferred): # unbound schema with deferreds
+                appstruct = null
+            cstruct = self.typ.serialize(self, appstruct)
+            return cstruct
+        finally:
+            if frame is not None:
+                _profile_exit(frame)
 
     def flatten(self, appstruct):
         """ Create and return a data structure which is a flattened
@@ -2097,9 +3091,15 @@ class _SchemaNode(object):
         """ Create and return a data structure with nested substructures based
         on the schema represented by this node using the flattened
         representation passed in. This is the inverse operation to
-        :meth:`colander.SchemaNode.flatten`."""
-        paths = sorted(fstruct.keys())
-        return self.typ.unflatten(self, paths, fstruct)
+        :meth:`colander.SchemaNode.flatten`.
+
+        Each key of ``fstruct`` is split once into a tree of names, which is
+        walked along with the schema; nodes whose type overrides
+        ``unflatten`` receive the sorted paths of their subtree."""
+        if _unflatten_kind(self) is None:
+            paths = sorted(fstruct.keys())
+            return self.typ.unflatten(self, paths, fstruct)
+        return _unflatten_entry(self, _unflatten_trie(self, fstruct), {})
 
     def set_value(self, appstruct, dotted_name, value):
         """ Uses the schema to set a value in a nested datastructure from a
@@ -2111,7 +3111,80 @@ class _SchemaNode(object):
         the value specified by the dotted name path."""
         return self.typ.get_value(self, appstruct, dotted_name)
 
-    def deserialize(self, cstruct=null):
+    def accessor(self, dotted_name):
+        """ Return a :class:`colander.Accessor` which gets and sets the
+        value specified by the dotted name path in the appstructs of this
+        schema, like :meth:`colander.SchemaNode.get_value` and
+        :meth:`colander.SchemaNode.set_value` do, but without parsing the
+        path again on every call.  A :exc:`KeyError` is raised if the path
+        does not exist in the schema, and a :exc:`ValueError` if it holds
+        a sequence index which is not an integer."""
+        return Accessor(self, dotted_name)
+
+    def get_values(self, appstruct, dotted_names):
+        """ Return a dictionary mapping each dotted name path of the
+        iterable ``dotted_names`` to its value in ``appstruct``, as
+        retrieved by :meth:`colander.SchemaNode.get_value`.  The values
+        shared by several paths, such as the mapping holding the values of
+        the paths ``a.b`` and ``a.c``, are only looked up once."""
+        # the paths split into a tree of [node, kind, leaves, rests, children]
+        # entries: leaves are the (path, key) pairs of the paths whose value
+        # is at key in the value of node, rests the (path, rest) pairs of
+        # the paths which continue through a type with its own get_value,
+        # and children maps the other names to (key, entry) pairs.  The kind
+        # and child positions of each node are only looked up once, as the
+        # nodes below a sequence are met once per index.
+        plans = {}
+        def make_entry(node):
+            plan = plans.get(id(node))
+            if plan is None:
+                positions = dict((child.name, pos) for pos, child
+                                 in reversed(list(enumerate(node.children))))
+                plan = plans[id(node)] = _value_kind(node), positions
+            return [node, plan[0], [], [], {}]
+
+        root = make_entry(self)
+        for dotted_name in dotted_names:
+            names = dotted_name.split('.')
+            last = len(names) - 1
+            entry = root
+            for index, name in enumerate(names):
+                node, kind, leaves, rests, children = entry
+                if kind is None:
+                    rests.append((dotted_name, '.'.join(names[index:])))
+                    break
+                if name in children:
+                    key, entry = children[name]
+                    if index == last:
+                        leaves.append((dotted_name, key))
+                    continue
+                if kind == 'leaf':
+                    raise KeyError(name)
+                if kind == 'sequence':
+                    key = int(name)
+                    pos = 0
+                else:
+                    pos = plans[id(node)][1][name]
+                    key = pos if kind == 'tuple' else name
+                if index == last:
+                    leaves.append((dotted_name, key))
+                else:
+                    entry = make_entry(node.children[pos])
+                    children[name] = key, entry
+
+        result = {}
+        todo = [(root, appstruct)]
+        while todo:
+            (node, kind, leaves, rests, children), value = todo.pop()
+            for dotted_name, key in leaves:
+                result[dotted_name] = value[key]
+            for dotted_name, rest in rests:
+                result[dotted_name] = node.typ.get_value(node, value, rest)
+            for key, entry in children.values():
+                todo.append((entry, value[key]))
+        return result
+
+    def deserialize(self, cstruct=null, fail_fast=False):
         """ Deserialize the :term:`cstruct` into an :term:`appstruct` based
         on the schema, run this :term:`appstruct` through the
         preparer, if one is present, then validate the
@@ -2134,37 +3207,209 @@ class _SchemaNode(object):
 
         If a ``cstruct`` argument is not explicitly provided, it
         defaults to :attr:`colander.null`.
-        """
-        appstruct = self.typ.deserialize(self, cstruct)
 
-        if self.preparer is not None:
-            # if the preparer is a function, call a single preparer
-            if hasattr(self.preparer, '__call__'):
-                appstruct = self.preparer(appstruct)
-            # if the preparer is a list, call each separate preparer
-            elif is_nonstr_iter(self.preparer):
-                for preparer in self.preparer:
-                    appstruct = preparer(appstruct)
-
-        if appstruct is null:
-            appstruct = self.missing
-            if appstruct is required:
-                raise Invalid(self, _(self.missing_msg,
-                                      mapping={'title': self.title,
-                                               'name':self.name}))
-
-            if isinstance(appstruct, deferred): # unbound schema with deferreds
-                raise Invalid(self, self.missing_msg)
-            # We never deserialize or validate the missing value
+        If ``fail_fast`` is true, deserialization stops at the first error
+        instead of collecting the errors of every child: the
+        :exc:`colander.Invalid` exception raised only describes that error,
+        through the chain of nodes leading to it, and :class:`colander.All`
+        validators stop at their first failing subvalidator.  This is
+        cheaper when only the validity of the cstruct matters.  The mode is
+        honored by the :class:`colander.Mapping`, :class:`colander.Tuple`
+        and :class:`colander.Sequence` types; nodes whose class overrides
+        ``deserialize`` and other types deserialize as usual.
+        """
+        frame = None
+        if _profiles is not None:
+            frame = _profile_enter(_profiles, self, 'deserialize')
+        try:
+            if fail_fast and _stock_container(self.typ):
+                appstruct = self.typ.deserialize(self, cstruct, fail_fast=True)
+            else:
+                appstruct = self.typ.deserialize(self, cstruct)
+            if frame is not None:
+                frame.mark('preparer')
+
+            if self.preparer is not None:
+                # if the preparer is a function, call a single preparer
+                if hasattr(self.preparer, '__call__'):
+                    appstruct = self.preparer(appstruct)
+                # if the preparer is a list, call each separate preparer
+                elif is_nonstr_iter(self.preparer):
+                    for preparer in self.preparer:
+                        appstruct = preparer(appstruct)
+            if frame is not None:
+                frame.mark('validator')
+
+            if appstruct is null:
+                appstruct = self.missing
+                if appstruct is required:
+                    raise Invalid(self, _lazy(self.missing_msg,
+                                              mapping={'title': self.title,
+                                                       'name':self.name}))
+
+                if isinstance(appstruct, deferred): # unbound schema
+                    raise Invalid(self, self.missing_msg)
+                # We never deserialize or validate the missing value
+                return appstruct
+
+            if self.validator is not None:
+                if isinstance(self.validator, deferred): # unbound
+                    raise UnboundDeferredError(
+                        "Schema node {node} has an unbound deferred validator"
+                        .format(node=self))
+                if fail_fast and isinstance(self.validator, All):
+                    self.validator(self, appstruct, fail_fast=True)
+                else:
+                    self.validator(self, appstruct)
             return appstruct
+        finally:
+            if frame is not None:
+                _profile_exit(frame)
+
+    def validate(self, cstruct=null):
+        """ Raise the :exc:`colander.Invalid` exception
+        :meth:`colander.SchemaNode.deserialize` would raise for the
+        :term:`cstruct`, if any, and return ``None`` otherwise.
+
+        Use this when only the validity of a cstruct matters: wherever the
+        schema allows it, the deserialized :term:`appstruct` is not built.
+        This is the case of the :class:`colander.Mapping`,
+        :class:`colander.Tuple` and :class:`colander.Sequence` nodes which
+        have no ``preparer`` and no ``validator`` (those need the
+        appstruct); their children are checked like the ``validate``
+        method of the type does.  Leaf values are still converted, as that
+        is how they are checked.
+
+        The way each node of the schema is checked is worked out the first
+        time it is validated, leaves getting the callable
+        :meth:`colander.SchemaNode.compile` would make for them, and is
+        kept until the schema changes, through the attributes of its nodes,
+        their ``children`` lists or the ``add``, ``insert``,
+        ``__setitem__`` and ``__delitem__`` methods.
+        """
+        _validate_plan(self)(cstruct)
+
+    def iter_deserialize(self, cstruct=null):
+        """ Lazily deserialize the items of the :term:`cstruct` iterable
+        ``cstruct``, yielding an ``(index, appstruct)`` pair for each valid
+        item and an ``(index, error)`` pair, where ``error`` is a
+        :exc:`colander.Invalid` exception, for each invalid one.  Items
+        are pulled from ``cstruct`` one at a time, so it may be a generator
+        producing any number of items.
+
+        This is only supported by schema nodes whose type provides an
+        ``iter_deserialize`` method, such as :class:`colander.Sequence`;
+        a :exc:`TypeError` is raised otherwise.  The ``preparer``,
+        ``validator`` and ``missing`` value of this node itself are not
+        used, as they apply to the deserialized sequence as a whole.
+        """
+        iter_deserialize = getattr(self.typ, 'iter_deserialize', None)
+        if iter_deserialize is None:
+            raise TypeError(
+                'The node type %s does not support iterative '
+                'deserialization' % self.typ.__class__)
+        return iter_deserialize(self, cstruct)
+
+    def compile(self, fail_fast=False):
+        """ Return a callable which deserializes a :term:`cstruct` exactly
+        like :meth:`colander.SchemaNode.deserialize` does, producing the same
+        :term:`appstruct` and the same :exc:`colander.Invalid` tree.  If
+        ``fail_fast`` is true, the callable deserializes like
+        ``deserialize(cstruct, fail_fast=True)`` does instead.
+
+        The schema is walked once, when this method is called, and the
+        mapping, tuple and sequence types, preparers, validators and
+        ``missing`` values found are baked into a chain of specialized
+        closures, so the per-call dispatch overhead of the generic
+        ``deserialize`` path is not paid again.  Nodes which the compiler
+        does not understand (a custom type which subclasses one of the
+        container types, a node class which overrides ``deserialize``, or a
+        node which still carries unbound :class:`colander.deferred` values)
+        are deserialized through their generic ``deserialize`` method.
+
+        The compiled callable reflects the schema as it was when this method
+        was called; compile a bound schema, and recompile it if the schema
+        is changed afterwards.
+        """
+        return _compile_node(self, fail_fast)
+
+    def compile_flatten(self, iterate=False):
+        """ Return a callable which flattens an :term:`appstruct` exactly
+        like :meth:`colander.SchemaNode.flatten` does.  If ``iterate`` is
+        true, the callable returns an iterator of the ``(key, value)``
+        items of the flattened appstruct instead of a dictionary, so that
+        they can be written out without building the dictionary.
+
+        The schema is walked once, when this method is called: the dotted
+        keys of the nodes are joined (and interned) at that time, except for
+        the sequence indexes, which are formatted while flattening, and
+        every item is stored straight into the resulting dictionary.  Nodes
+        whose type overrides ``flatten`` are flattened by that method.
+
+        Like :meth:`colander.SchemaNode.compile`, the callable reflects the
+        schema as it was when this method was called.
+        """
+        write, iterate_items = _compile_flatten(self)
+        if iterate:
+            return lambda appstruct: iterate_items(appstruct, '')
 
-        if self.validator is not None:
-            if isinstance(self.validator, deferred): # unbound
-                raise UnboundDeferredError(
-                    "Schema node {node} has an unbound deferred validator"
-                    .format(node=self))
-            self.validator(self, appstruct)
-        return appstruct
+        def flatten(appstruct):
+            result = {}
+            write(appstruct, '', result)
+            return result
+        return flatten
+
+    def deserialize_many(self, cstructs):
+        """ Deserialize every :term:`cstruct` of the iterable ``cstructs``
+        against this schema and return a list holding, in input order,
+        either the :term:`appstruct` of each cstruct or the
+        :exc:`colander.Invalid` exception its deserialization raised.  A
+        bad cstruct does not prevent the remaining ones from being
+        deserialized.
+
+        The schema is compiled once (see
+        :meth:`colander.SchemaNode.compile`) for the whole batch, which
+        makes this faster than calling ``deserialize`` in a loop.
+        """
+        deserialize = self.compile()
+        results = []
+        append = results.append
+        for cstruct in cstructs:
+            try:
+                append(deserialize(cstruct))
+            except Invalid as e:
+                append(e)
+        return results
+
+    def _child_index(self):
+        # The name -> position index of ``children``, mapping each name to
+        # its first occurrence.  Appending a child updates it; any other
+        # change of ``children``, or the renaming of a child, forgets it
+        # (see ``_NodeList``).
+        cache = self.__dict__.get('_child_index_cache')
+        if cache is None or cache[0] != _SchemaMeta._changes:
+            index = {}
+            for pos, node in enumerate(_watch_children(self)):
+                index.setdefault(node.name, pos)
+                _link_parent(node, self)
+            cache = (_SchemaMeta._changes, index)
+            self.__dict__['_child_index_cache'] = cache
+        return cache[1]
+
+    def _child_name_set(self):
+        # the names of ``children`` as a frozenset, cached alongside the
+        # index it is computed from; appending only ever adds names to the
+        # index in place, so its length tells whether the set is current
+        index = self._child_index()
+        cached = self.__dict__.get('_child_name_set_cache')
+        if cached is None or cached[0] is not index or cached[1] != len(index):
+            cached = (index, len(index), frozenset(index))
+            self.__dict__['_child_name_set_cache'] = cached
+        return cached[2]
+
+    def _position(self, name):
+        # the position of the first child named ``name`` or None
+        return self._child_index().get(name)
 
     def add(self, node):
         """ Append a subnode to this node. ``node`` must be a SchemaNode."""
@@ -2178,19 +3423,18 @@ class _SchemaNode(object):
     def add_before(self, name, node):
         """ Insert a subnode into the position before the node named ``name``
         """
-        for pos, sub in enumerate(self.children[:]):
-            if sub.name == name:
-                self.insert(pos, node)
-                return
-        raise KeyError('No such node named %s' % name)
+        pos = self._position(name)
+        if pos is None:
+            raise KeyError('No such node named %s' % name)
+        self.insert(pos, node)
 
     def get(self, name, default=None):
         """ Return the subnode associated with ``name`` or ``default`` if no
         such node exists."""
-        for node in self.children:
-            if node.name == name:
-                return node
-        return default
+        pos = self._position(name)
+        if pos is None:
+            return default
+        return self.children[pos]
 
     def clone(self):
         """ Clone the schema node and return the clone.  All subnodes
@@ -2198,7 +3442,13 @@ class _SchemaNode(object):
         dictionaries are preserved."""
         cloned = self.__class__(self.typ)
         cloned.__dict__.update(self.__dict__)
-        cloned.children = [node.clone() for node in self.children]
+        if not _derived_attrs.isdisjoint(self.__dict__):
+            for name in _derived_attrs.intersection(self.__dict__):
+                del cloned.__dict__[name]
+        # nothing was derived from the clone yet: skip __setattr__
+        cloned.__dict__['children'] = _node_list(
+            cloned, [node.clone() for node in self.children])
+        _copy_derived(self, cloned)
         return cloned
 
     def bind(self, **kw):
@@ -2208,15 +3458,76 @@ class _SchemaNode(object):
         *clones* the schema it is called upon and returns the cloned
         value.  The original schema node (the source of the clone)
         is not modified."""
+        _bind_state(self) # computed once here, then copied by clone
         cloned = self.clone()
         cloned._bind(kw)
         return cloned
 
+    def bind_shared(self, **kw):
+        """ Resolve any deferred values attached to this schema node and
+        its children (recursively) like :meth:`colander.SchemaNode.bind`
+        does, but only copy the nodes which need binding: nodes carrying
+        :class:`colander.deferred` values, and their ancestors.  Every other
+        subtree of the returned schema *is* the corresponding subtree of
+        this schema, shared rather than cloned, which makes binding a large
+        schema with few deferred values cheap.
+
+        Nodes with an ``after_bind`` callback have their whole subtree
+        cloned before the callback is called, as the callback may change
+        their children.  The returned node is always a copy.
+
+        Because subtrees are shared, the result must be treated as
+        read-only: changing a shared node changes this schema too.  Shared
+        nodes also keep their unbound ``bindings`` attribute (``None``);
+        only copied nodes have ``bindings`` set to ``kw``.  Use ``bind``
+        when the bound schema is going to be modified."""
+        bound = self._bind_shared(kw)
+        if bound is self:
+            bound = self._shallow_copy(list(self.children))
+            bound.bindings = kw
+        return bound
+
+    def _bind_shared(self, kw):
+        if not _bind_state(self)[2]:
+            # no deferred value and no after_bind callback in the subtree
+            return self
+        if getattr(self, 'after_bind', None):
+            cloned = self.clone()
+            cloned._bind(kw)
+            return cloned
+        children = [child._bind_shared(kw) for child in self.children]
+        bound = self._shallow_copy(children)
+        bound.bindings = kw
+        bound._resolve_deferreds(_deferred_names(self), kw)
+        return bound
+
+    def _shallow_copy(self, children):
+        copied = object.__new__(self.__class__)
+        copied.__dict__.update(self.__dict__)
+        for name in _derived_attrs:
+            copied.__dict__.pop(name, None)
+        del copied.__dict__['children'] # the children of self
+        copied.children = children
+        _copy_child_index(self, copied)
+        return copied
+
     def _bind(self, kw):
         self.bindings = kw
+        if not _bind_state(self)[2]:
+            # nothing to resolve in the subtree
+            nodes = list(self.children)
+            while nodes:
+                node = nodes.pop()
+                node.bindings = kw
+                nodes.extend(node.children)
+            return
         for child in self.children:
             child._bind(kw)
-        names = dir(self)
+        self._resolve_deferreds(_deferred_names(self), kw)
+        if getattr(self, 'after_bind', None):
+            self.after_bind(self, kw)
+
+    def _resolve_deferreds(self, names, kw):
         for k in names:
             v = getattr(self, k)
             if isinstance(v, deferred):
@@ -2225,8 +3536,6 @@ class _SchemaNode(object):
                     self[k] = v
                 else:
                     setattr(self, k, v)
-        if getattr(self, 'after_bind', None):
-            self.after_bind(self, kw)
 
     def cstruct_children(self, cstruct):
         """ Will call the node's type's ``cstruct_children`` method with this
@@ -2248,10 +3557,10 @@ class _SchemaNode(object):
 
     def __delitem__(self, name):
         """ Remove a subnode by name """
-        for idx, node in enumerate(self.children[:]):
-            if node.name == name:
-                return self.children.pop(idx)
-        raise KeyError(name)
+        pos = self._position(name)
+        if pos is None:
+            raise KeyError(name)
+        return self.children.pop(pos)
 
     def __getitem__(self, name):
         """ Get a subnode by name. """
@@ -2267,11 +3576,13 @@ class _SchemaNode(object):
         ``add`` method with the node (it will be appended to the children
         list)."""
         newnode.name = name
-        for idx, node in enumerate(self.children[:]):
-            if node.name == name:
-                self.children[idx] = newnode
-                return node
-        self.add(newnode)
+        pos = self._position(name)
+        if pos is None:
+            self.add(newnode)
+            return
+        node = self.children[pos]
+        self.children[pos] = newnode
+        return node
 
     def __iter__(self):
         """ Iterate over the children nodes of this schema node """
@@ -2279,7 +3590,7 @@ class _SchemaNode(object):
 
     def __contains__(self, name):
         """ Return True if subnode named ``name`` exists in this node """
-        return self.get(name, _marker) is not _marker
+        return self._position(name) is not None
 
     def __repr__(self):
         return '<%s.%s object at %d (named %s)>' % (
@@ -2306,6 +3617,17 @@ class _SchemaNode(object):
         raise Invalid(node, msg)
 
 class _SchemaMeta(type):
+    # bumped whenever an attribute of a schema node class is set or deleted
+    _changes = 0
+
+    def __setattr__(cls, name, value):
+        _SchemaMeta._changes += 1
+        type.__setattr__(cls, name, value)
+
+    def __delattr__(cls, name):
+        _SchemaMeta._changes += 1
+        type.__delattr__(cls, name)
+
     def __init__(cls, name, bases, clsattrs):
         nodes = []
 
@@ -2363,9 +3685,288 @@ class SequenceSchema(SchemaNode):
 
         attributes = self.__dict__.copy()
         attributes.pop('children', None)
+        for name in _derived_attrs:
+            attributes.pop(name, None)
         cloned.__dict__.update(attributes)
+        _copy_derived(self, cloned)
         return cloned
 
+def _class_deferred_names(cls):
+    # the names of the deferred values defined on a node class, cached per
+    # class until an attribute of any schema node class changes
+    cached = cls.__dict__.get('_deferred_class_names')
+    if cached is None or cached[0] != _SchemaMeta._changes:
+        names = tuple(
+            name for name in dir(cls)
+            if isinstance(getattr(cls, name, None), deferred)
+            )
+        cached = (_SchemaMeta._changes, names)
+        type.__setattr__(cls, '_deferred_class_names', cached)
+    return cached[1]
+
+_no_names = frozenset()
+
+def _deferred_names(node):
+    # the sorted names of the deferred values visible as attributes of
+    # ``node``, in the order ``dir(node)`` would list them; the instance
+    # attributes holding deferreds are registered by ``__init__`` and
+    # ``__setattr__``
+    attrs = node.__dict__
+    names = list(attrs.get('_deferred_instance_attrs', _no_names))
+    for name in _class_deferred_names(type(node)):
+        if name not in attrs:
+            names.append(name)
+    names.sort()
+    return names
+
+# the attributes of a schema node which the bind state and the validate
+# plan of its subtree depend on, besides its deferred values
+_subtree_attrs = frozenset([
+    'children', 'after_bind', 'typ', 'preparer', 'validator', 'missing',
+    'default', 'name', 'deserialize', 'validate',
+    ])
+
+# the caches of a schema node derived from its subtree, which are never
+# copied, pickled or shared with another node
+_derived_attrs = frozenset([
+    '_bind_state', '_validate_plan', '_child_index_cache',
+    '_child_name_set_cache',
+    ])
+
+class _NodeList(list):
+    # the ``children`` list of a schema node.  Once something is derived
+    # from the list (see _watch_children), changing it, directly or through
+    # the methods of the node, tells the node (see _children_changed).
+    __slots__ = ('_owner',)
+
+    def __reduce_ex__(self, protocol):
+        # copies and pickles are plain lists
+        return list, (list(self),)
+
+    def _changed(self, removed=()):
+        owner = self._owner()
+        if owner is not None:
+            _children_changed(owner, removed)
+
+    def append(self, node):
+        list.append(self, node)
+        if self._owner is not None:
+            owner = self._owner()
+            if owner is not None:
+                _appended(owner, node, len(self) - 1)
+
+    def extend(self, nodes):
+        list.extend(self, nodes)
+        if self._owner is not None:
+            self._changed()
+
+    def insert(self, index, node):
+        list.insert(self, index, node)
+        if self._owner is not None:
+            self._changed()
+
+    def pop(self, *args):
+        node = list.pop(self, *args)
+        if self._owner is not None:
+            self._changed((node,))
+        return node
+
+    def remove(self, node):
+        list.remove(self, node)
+        if self._owner is not None:
+            self._changed((node,))
+
+    def clear(self):
+        del self[:]
+
+    def __setitem__(self, index, value):
+        if self._owner is None:
+            return list.__setitem__(self, index, value)
+        removed = self[index]
+        list.__setitem__(self, index, value)
+        self._changed(removed if isinstance(index, slice) else (removed,))
+
+    def __delitem__(self, index):
+        if self._owner is None:
+            return list.__delitem__(self, index)
+        removed = self[index]
+        list.__delitem__(self, index)
+        self._changed(removed if isinstance(index, slice) else (removed,))
+
+    if PY2: # pragma: no cover
+        def __setslice__(self, i, j, value):
+            self.__setitem__(slice(i, j), value)
+
+        def __delslice__(self, i, j):
+            self.__delitem__(slice(i, j))
+
+    def __iadd__(self, nodes):
+        list.__iadd__(self, nodes)
+        if self._owner is not None:
+            self._changed()
+        return self
+
+    def __imul__(self, count):
+        removed = list(self)
+        list.__imul__(self, count)
+        if self._owner is not None:
+            self._changed(removed)
+        return self
+
+    def sort(self, *args, **kw):
+        list.sort(self, *args, **kw)
+        if self._owner is not None:
+            self._changed()
+
+    def reverse(self):
+        list.reverse(self)
+        if self._owner is not None:
+            self._changed()
+
+def _node_list(node, nodes):
+    # nodes as the children list of node
+    if (type(nodes) is _NodeList and nodes._owner is not None and
+        nodes._owner() is node):
+        return nodes
+    children = _NodeList(nodes)
+    children._owner = None
+    return children
+
+def _watch_children(node):
+    # the children list of node, which from now on tells node of its
+    # changes
+    children = node.children
+    if type(children) is not _NodeList:
+        # set through __dict__
+        children = node.__dict__['children'] = _node_list(node, children)
+    if children._owner is None:
+        children._owner = weakref.ref(node)
+    return children
+
+def _appended(node, child, pos):
+    # child was appended to the children of node at pos: a current index
+    # is kept up to date, everything else is forgotten
+    attrs = node.__dict__
+    cache = attrs.get('_child_index_cache')
+    if cache is not None:
+        if isinstance(child, _SchemaNode):
+            cache[1].setdefault(child.name, pos)
+            _link_parent(child, node)
+        else:
+            del attrs['_child_index_cache']
+    if '_bind_state' in attrs:
+        _node_changed(node)
+
+def _children_changed(node, removed):
+    # the children list of node was changed and ``removed`` taken out of it
+    node.__dict__.pop('_child_index_cache', None)
+    if removed:
+        _unlink_parent(removed, node)
+    _node_changed(node)
+
+def _node_changed(node, renamed=False):
+    # forget what was derived from the subtree of node: the index of its
+    # parents when it was renamed, and the bind state and validate plan of
+    # node and of its ancestors
+    attrs = node.__dict__
+    if renamed:
+        for parent in _live_parents(node):
+            parent.__dict__.pop('_child_index_cache', None)
+    if '_bind_state' not in attrs:
+        # neither have the ancestors of a node without a bind state
+        return
+    nodes = [node]
+    while nodes:
+        node = nodes.pop()
+        attrs = node.__dict__
+        attrs.pop('_validate_plan', None)
+        if attrs.pop('_bind_state', None) is not None:
+            nodes.extend(_live_parents(node))
+
+def _live_parents(node):
+    # the parents linked to node which are alive
+    parents = [ref() for ref in getattr(node, '_parents', ())]
+    return [parent for parent in parents if parent is not None]
+
+def _link_parent(node, parent):
+    # record a weak reference to parent in node, whose changes are to be
+    # passed on to the caches of parent
+    parents = getattr(node, '_parents', None)
+    if parents is None:
+        object.__setattr__(node, '_parents', set([weakref.ref(parent)]))
+        return
+    size = len(parents)
+    if size >= 8 and not size & (size - 1):
+        # a node shared by many parents, such as a node defined by a
+        # schema class: drop the dead ones when the set doubles
+        parents.difference_update(
+            [ref for ref in parents if ref() is None])
+    parents.add(weakref.ref(parent))
+
+def _unlink_parent(nodes, parent):
+    # unlink parent from the nodes taken out of its children, unless they
+    # still are among them
+    remaining = None
+    for node in nodes:
+        if not isinstance(node, _SchemaNode):
+            continue
+        parents = getattr(node, '_parents', None)
+        if not parents:
+            continue
+        if remaining is None:
+            remaining = set(map(id, parent.children))
+            ref = weakref.ref(parent)
+        if id(node) not in remaining:
+            parents.discard(ref)
+
+def _bind_state(node):
+    # the (_SchemaMeta._changes, has_deferreds, needs binding) state of the
+    # subtree of node: it needs binding if it has deferred values or
+    # after_bind callbacks.  Computing it links the children to node, so
+    # that changing them forgets it; a node with a bind state implies that
+    # its descendants have one too.
+    state = node.__dict__.get('_bind_state')
+    if state is not None and state[0] == _SchemaMeta._changes:
+        return state
+    has_deferreds = bool(_deferred_names(node))
+    needs_bind = has_deferreds or bool(getattr(node, 'after_bind', None))
+    for child in _watch_children(node):
+        child_state = _bind_state(child)
+        has_deferreds = has_deferreds or child_state[1]
+        needs_bind = needs_bind or child_state[2]
+        _link_parent(child, node)
+    state = (_SchemaMeta._changes, has_deferreds, needs_bind)
+    node.__dict__['_bind_state'] = state
+    return state
+
+def _copy_derived(node, cloned):
+    # the clone of a subtree has the same bind state and child index as the
+    # subtree, provided these are current and the clones of the children
+    # have a bind state; the cloned children are fresh, and cloned is their
+    # only parent
+    attrs = node.__dict__
+    if _derived_attrs.isdisjoint(attrs):
+        return
+    state = attrs.get('_bind_state')
+    if state is not None and state[0] == _SchemaMeta._changes:
+        children = _watch_children(cloned)
+        if all('_bind_state' in child.__dict__ for child in children):
+            if children:
+                parents = set([weakref.ref(cloned)])
+                for child in children:
+                    object.__setattr__(child, '_parents', parents.copy())
+            cloned.__dict__['_bind_state'] = state
+    _copy_child_index(node, cloned)
+
+def _copy_child_index(node, cloned):
+    # a copy's children have the same names at the same positions, so the
+    # index of the original can be reused instead of being rebuilt
+    cache = node.__dict__.get('_child_index_cache')
+    if cache is not None and cache[0] == _SchemaMeta._changes:
+        for child in _watch_children(cloned):
+            _link_parent(child, cloned)
+        cloned.__dict__['_child_index_cache'] = (cache[0], dict(cache[1]))
+
 class deferred(object):
     """ A decorator which can be used to define deferred schema values
     (missing values, widgets, validators, etc.)"""
@@ -2379,6 +3980,560 @@ class deferred(object):
     def __call__(self, node, kw):
         return self.wrapped(node, kw)
 
+def _overrides(node, name):
+    # true if the node's class or the node itself replaces the _SchemaNode
+    # implementation of the method ``name``
+    if name in node.__dict__:
+        return True
+    impl = getattr(type(node), name)
+    return getattr(impl, '__func__', impl) is not _SchemaNode.__dict__[name]
+
+def _deserialize_fail_fast(node, cstruct):
+    # the callback of the container types in fail fast mode
+    if isinstance(node, _SchemaNode) and not _overrides(node, 'deserialize'):
+        return node.deserialize(cstruct, fail_fast=True)
+    return node.deserialize(cstruct)
+
+def _validate_child(node, cstruct):
+    # the ``validate`` of the container types checks children with this
+    if isinstance(node, _SchemaNode):
+        node.validate(cstruct)
+    else:
+        node.deserialize(cstruct)
+
+def _stock_container(typ):
+    # true if ``typ`` uses the ``deserialize`` method of one of the
+    # container types, which accepts the ``fail_fast`` argument and is
+    # mirrored by the type's ``validate`` method
+    impl = type(typ).deserialize
+    return getattr(impl, '__func__', impl) in _container_deserializers
+
+def _compile_node(node, fail_fast=False, snapshot=True):
+    # the deserialize function of node; with ``snapshot`` false, it uses
+    # the validators and preparers of node as they are when it is called,
+    # as a function kept across calls must see the changes made to them
+    if not isinstance(node, _SchemaNode) or _overrides(node, 'deserialize'):
+        return node.deserialize
+
+    preparer = node.preparer
+    validator = node.validator
+    missing = node.missing
+    for value in (preparer, validator, missing):
+        if isinstance(value, deferred): # unbound schema with deferreds
+            if fail_fast:
+                return functools.partial(node.deserialize, fail_fast=True)
+            return node.deserialize
+
+    if snapshot and type(validator) is All and _fusible(validator):
+        validator = StringRules(*validator.validators)
+    if fail_fast and isinstance(validator, All):
+        validator = functools.partial(validator, fail_fast=True)
+
+    typ = node.typ
+    compiler = _type_compilers.get(type(typ))
+    convert = compiler and compiler(node, typ, fail_fast)
+    if convert is None:
+        if fail_fast and _stock_container(typ):
+            convert = functools.partial(typ.deserialize, node, fail_fast=True)
+        else:
+            convert = functools.partial(typ.deserialize, node)
+
+    if preparer is None:
+        preparers = ()
+    elif hasattr(preparer, '__call__'):
+        preparers = (preparer,)
+    elif is_nonstr_iter(preparer):
+        # without a snapshot, the list is read when called
+        preparers = tuple(preparer) if snapshot else preparer
+    else:
+        preparers = ()
+
+    def get_missing():
+        if missing is required:
+            raise Invalid(node, _lazy(node.missing_msg,
+                                      mapping={'title': node.title,
+                                               'name':node.name}))
+        # We never deserialize or validate the missing value
+        return missing
+
+    # the common shapes get their own closures so that the per-call work
+    # is only what the node actually needs
+    if preparers == () and validator is None:
+        def deserialize(cstruct=null):
+            appstruct = convert(cstruct)
+            if appstruct is null:
+                return get_missing()
+            return appstruct
+
+    elif preparers == ():
+        def deserialize(cstruct=null):
+            appstruct = convert(cstruct)
+            if appstruct is null:
+                return get_missing()
+            validator(node, appstruct)
+            return appstruct
+
+    else:
+        def deserialize(cstruct=null):
+            appstruct = convert(cstruct)
+            for preparer in preparers:
+                appstruct = preparer(appstruct)
+            if appstruct is null:
+                return get_missing()
+            if validator is not None:
+                validator(node, appstruct)
+            return appstruct
+
+    return deserialize
+
+def _compile_mapping(node, typ, fail_fast):
+    _validate = typ._validate
+    unknown = typ.unknown
+    copy_unknown = typ.copy_unknown
+    plan = [
+        (num, subnode.name, subnode.default is drop,
+         _compile_node(subnode, fail_fast))
+        for num, subnode in enumerate(node.children)
+        ]
+    names = frozenset(subnode.name for subnode in node.children)
+    shared = _child_names(node) is None # two children share a name
+
+    def convert(cstruct):
+        if cstruct is null:
+            return null
+
+        if shared or type(cstruct) is not dict:
+            value = _validate(node, cstruct)
+            lookup = value.pop # the keys left are unknown
+        else:
+            value = cstruct
+            lookup = value.get
+        if unknown == 'raise' and not names.issuperset(value):
+            # reject unknown keys before deserializing any child
+            _raise_unknown(node, _unknown_items(value, names))
+        error = None
+        result = {}
+
+        for num, name, drop_default, deserialize in plan:
+            subval = lookup(name, null)
+            if subval is drop or (subval is null and drop_default):
+                continue
+            try:
+                sub_result = deserialize(subval)
+            except Invalid as e:
+                if error is None:
+                    error = Invalid(node)
+                error.add(e, num)
+                if fail_fast:
+                    raise error
+            else:
+                if sub_result is drop:
+                    continue
+                result[name] = sub_result
+
+        if unknown == 'preserve':
+            if value is cstruct:
+                value = _unknown_items(value, names)
+            _preserve_unknown(copy_unknown, value, result)
+
+        if error is not None:
+            raise error
+
+        return result
+
+    return convert
+
+def _compile_tuple(node, typ, fail_fast):
+    _validate = typ._validate
+    plan = list(enumerate(_compile_node(subnode, fail_fast)
+                          for subnode in node.children))
+
+    def convert(cstruct):
+        if cstruct is null:
+            return null
+
+        value = _validate(node, cstruct)
+        error = None
+        result = []
+
+        for num, deserialize in plan:
+            try:
+                result.append(deserialize(value[num]))
+            except Invalid as e:
+                if error is None:
+                    error = Invalid(node)
+                error.add(e, num)
+                if fail_fast:
+                    raise error
+
+        if error is not None:
+            raise error
+
+        return tuple(result)
+
+    return convert
+
+def _compile_sequence(node, typ, fail_fast):
+    if not node.children:
+        return None
+    _validate = typ._validate
+    accept_scalar = typ.accept_scalar
+    subnode = node.children[0]
+    drop_default = subnode.default is drop
+    deserialize = _compile_node(subnode, fail_fast)
+
+    def convert(cstruct):
+        if cstruct is null:
+            return null
+
+        value = _validate(node, cstruct, accept_scalar)
+        error = None
+        result = []
+
+        for num, subval in enumerate(value):
+            if subval is drop or (subval is null and drop_default):
+                continue
+            try:
+                sub_result = deserialize(subval)
+            except Invalid as e:
+                if error is None:
+                    error = Invalid(node)
+                error.add(e, num)
+                if fail_fast:
+                    raise error
+            else:
+                if sub_result is drop:
+                    continue
+                result.append(sub_result)
+
+        if error is not None:
+            raise error
+
+        return result
+
+    return convert
+
+# Only exact instances of these types are specialized by the compiler:
+# subclasses may override ``deserialize`` or ``_impl`` in ways the compiled
+# code would not honor, so they take the generic path.
+_type_compilers = {
+    Mapping: _compile_mapping,
+    Tuple: _compile_tuple,
+    Sequence: _compile_sequence,
+    }
+
+_container_deserializers = frozenset(
+    getattr(impl, '__func__', impl) for impl in
+    (Mapping.deserialize, Tuple.deserialize, Sequence.deserialize)
+    )
+
+def _validate_plan(node):
+    # the callable checking a cstruct for node.validate, compiled once for
+    # the subtree of node; computing the bind state first links the subtree
+    # to node, so that changing it forgets the plan (see _node_changed)
+    if _profiles is not None:
+        return node.deserialize # the profiles time deserialize
+    plan = node.__dict__.get('_validate_plan')
+    if plan is None or plan[0] != _SchemaMeta._changes:
+        _bind_state(node)
+        plan = (_SchemaMeta._changes, _compile_validate(node))
+        node.__dict__['_validate_plan'] = plan
+    return plan[1]
+
+def _compile_validate(node, child=False):
+    # the validate counterpart of _compile_node: the mapping, tuple and
+    # sequence nodes which need no appstruct check their children without
+    # building one, and the leaves are compiled without snapshots of their
+    # validators
+    if not isinstance(node, _SchemaNode):
+        return node.deserialize
+    if child and _overrides(node, 'validate'):
+        return node.validate
+    typ = node.typ
+    if not _stock_container(typ):
+        return _compile_node(node, snapshot=False)
+    if (node.preparer is not None or node.validator is not None or
+        _overrides(node, 'deserialize')):
+        return node.deserialize # the appstruct is needed
+    compiler = _validate_compilers.get(type(typ))
+    if compiler is not None:
+        return compiler(node, typ)
+    check = functools.partial(typ.validate, node)
+
+    def validate(cstruct=null):
+        if cstruct is null:
+            return node.deserialize(cstruct)
+        check(cstruct)
+
+    return validate
+
+def _validate_checks(node):
+    # the (position, name, whether the default is drop, check) of each
+    # child of a container node
+    return [
+        (num, subnode.name, subnode.default is drop,
+         _compile_validate(subnode, child=True))
+        for num, subnode in enumerate(node.children)
+        ]
+
+def _compile_mapping_validate(node, typ):
+    checks = _validate_checks(node)
+    names = frozenset(subnode.name for subnode in node.children)
+    shared = _child_names(node) is None # two children share a name
+
+    def validate(cstruct=null):
+        if cstruct is null:
+            return node.deserialize(cstruct)
+        if shared or type(cstruct) is not dict:
+            value = typ._validate(node, cstruct)
+            lookup = value.pop # a shared name is only given to one child
+        else:
+            value = cstruct
+            lookup = value.get
+        if typ.unknown == 'raise' and not names.issuperset(value):
+            _raise_unknown(node, _unknown_items(value, names))
+        error = None
+
+        for num, name, drop_default, check in checks:
+            subval = lookup(name, null)
+            if subval is drop or (subval is null and drop_default):
+                continue
+            try:
+                check(subval)
+            except Invalid as e:
+                if error is None:
+                    error = Invalid(node)
+                error.add(e, num)
+
+        if error is not None:
+            raise error
+
+    return validate
+
+def _compile_tuple_validate(node, typ):
+    checks = _validate_checks(node)
+
+    def validate(cstruct=null):
+        if cstruct is null:
+            return node.deserialize(cstruct)
+        value = typ._validate(node, cstruct)
+        error = None
+
+        for num, name, drop_default, check in checks:
+            try:
+                check(value[num])
+            except Invalid as e:
+                if error is None:
+                    error = Invalid(node)
+                error.add(e, num)
+
+        if error is not None:
+            raise error
+
+    return validate
+
+def _compile_sequence_validate(node, typ):
+    if not node.children:
+        return node.deserialize
+    subnode = node.children[0]
+    drop_default = subnode.default is drop
+    check = _compile_validate(subnode, child=True)
+
+    def validate(cstruct=null):
+        if cstruct is null:
+            return node.deserialize(cstruct)
+        if isinstance(cstruct, (list, tuple)):
+            value = cstruct
+        else:
+            value = typ._validate(node, cstruct, typ.accept_scalar)
+        error = None
+
+        for num, subval in enumerate(value):
+            if subval is drop or (subval is null and drop_default):
+                continue
+            try:
+                check(subval)
+            except Invalid as e:
+                if error is None:
+                    error = Invalid(node)
+                error.add(e, num)
+
+        if error is not None:
+            raise error
+
+    return validate
+
+# Like _type_compilers, for validating; these read the attributes of the
+# types when called, as the plans are kept while the schema is unchanged.
+_validate_compilers = {
+    Mapping: _compile_mapping_validate,
+    Tuple: _compile_tuple_validate,
+    Sequence: _compile_sequence_validate,
+    }
+
+_timer = getattr(time, 'perf_counter', time.time)
+
+# the profiles which are active in any thread, or None; checked by the
+# ``deserialize`` and ``serialize`` methods of schema nodes
+_profiles = None
+_profiles_lock = threading.Lock()
+_profile_tokens = itertools.count()
+# the frames of the profiled calls in progress in the current thread
+_profile_local = threading.local()
+
+class profile(object):
+    """ A context manager which profiles the serialization and
+    deserialization of ``schema``::
+
+        with colander.profile(schema) as stats:
+            schema.deserialize(cstruct)
+        print(stats.to_json())
+
+    While the context is active, the calls of the ``deserialize`` and
+    ``serialize`` methods of ``schema``, of the schemas made from it by
+    ``clone``, ``bind`` and ``bind_shared``, and of their descendants
+    record their number of calls and their cumulative and self time (their
+    time minus the time of the nodes they called).  The self time of
+    ``deserialize`` is split into the ``type`` conversion, ``preparer`` and
+    ``validator`` phases; the whole time of ``serialize`` is attributed to
+    the ``type`` phase.  Timings are aggregated by path, so every item of a
+    sequence adds to the same entry.
+
+    Calls are timed by the methods of :class:`colander.SchemaNode`: a node
+    class which overrides them is only profiled if its methods call those
+    of its base class, and callables returned by
+    :meth:`colander.SchemaNode.compile` are not profiled.  Each thread
+    times its own calls, so a schema shared by several threads can be
+    profiled; their timings are added up.  Outside of the context, the
+    only cost of profiling is one check per call.
+    """
+    def __init__(self, schema):
+        self.schema = schema
+        self.entries = {}
+        self._token = next(_profile_tokens)
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        global _profiles
+        # copied along with the node by clone, bind and bind_shared
+        self.schema.__dict__['_profile_token'] = self._token
+        with _profiles_lock:
+            _profiles = (_profiles or ()) + (self,)
+        return self
+
+    def __exit__(self, *exc_info):
+        global _profiles
+        with _profiles_lock:
+            _profiles = tuple(p for p in _profiles if p is not self) or None
+        if self.schema.__dict__.get('_profile_token') == self._token:
+            del self.schema.__dict__['_profile_token']
+
+    def _record(self, frame, cumulative):
+        with self._lock:
+            entry = self.entries.get(frame.path)
+            if entry is None:
+                entry = self.entries[frame.path] = {
+                    'calls': 0, 'cumulative': 0.0, 'self': 0.0,
+                    'phases': {'type': 0.0, 'preparer': 0.0,
+                               'validator': 0.0},
+                    }
+            entry['calls'] += 1
+            entry['cumulative'] += cumulative
+            for phase, elapsed in frame.phases.items():
+                entry['self'] += elapsed
+                entry['phases'][phase] += elapsed
+
+    def asdict(self):
+        """ Return the timings as a tree of dictionaries.  The top level
+        maps the ``'deserialize'`` and ``'serialize'`` operations which were
+        profiled to the entries of the nodes they were called on, keyed by
+        name.  Each entry holds the number of ``calls`` of the node, its
+        ``cumulative`` and ``self`` times in seconds, the self time of each
+        of its ``phases`` and the entries of its ``children``, keyed by
+        name."""
+        result = {}
+        # parent paths sort before the paths of their children
+        for path in sorted(self.entries):
+            entry = dict(self.entries[path])
+            entry['phases'] = dict(entry['phases'])
+            entry['children'] = {}
+            entries = result.setdefault(path[0], {})
+            for name in path[1:-1]:
+                entries = entries[name]['children']
+            entries[path[-1]] = entry
+        return result
+
+    def to_json(self, **kw):
+        """ Return the result of :meth:`asdict` serialized as JSON; the
+        keyword arguments are passed to :func:`json.dumps`."""
+        import json
+        return json.dumps(self.asdict(), **kw)
+
+    def to_collapsed(self):
+        """ Return the timings in the collapsed stack format understood by
+        flame graph tools such as ``flamegraph.pl`` and speedscope: one
+        line per node path, made of the operation and the node names
+        separated by semicolons, followed by the self time of the path in
+        microseconds."""
+        lines = []
+        for path in sorted(self.entries):
+            frames = [name or '<unnamed>' for name in path]
+            lines.append('%s %d' % (
+                ';'.join(frames), round(self.entries[path]['self'] * 1e6)))
+        return ''.join(line + '\n' for line in lines)
+
+def _profile_enter(profiles, node, operation):
+    # start timing a call of ``operation`` on node, and return its frame,
+    # or None if no active profile records it
+    try:
+        stack = _profile_local.stack
+    except AttributeError:
+        stack = _profile_local.stack = []
+    if stack:
+        parent = stack[-1]
+        profile = parent.profile
+        path = parent.path + (node.name,)
+    else:
+        token = node.__dict__.get('_profile_token')
+        for profile in profiles:
+            if profile._token == token:
+                break
+        else:
+            return None
+        path = (operation, node.name)
+    frame = _ProfileFrame(profile, path)
+    stack.append(frame)
+    return frame
+
+def _profile_exit(frame):
+    frame.mark(None)
+    stack = _profile_local.stack
+    stack.pop()
+    cumulative = frame.last - frame.start
+    if stack:
+        stack[-1].pending += cumulative
+    frame.profile._record(frame, cumulative)
+
+class _ProfileFrame(object):
+    # the timing of one call of a profiled method: ``pending`` holds the
+    # time spent in the nodes called since the last mark, which is not
+    # part of the self time of the current phase
+    def __init__(self, profile, path):
+        self.profile = profile
+        self.path = path
+        self.phases = {}
+        self.phase = 'type'
+        self.pending = 0.0
+        self.start = self.last = _timer()
+
+    def mark(self, phase):
+        now = _timer()
+        elapsed = now - self.last - self.pending
+        self.phases[self.phase] = self.phases.get(self.phase, 0.0) + elapsed
+        self.phase = phase
+        self.pending = 0.0
+        self.last = now
+
 def _unflatten_mapping(node, paths, fstruct,
                        get_child=None, rewrite_subpath=None):
     if get_child is None:
@@ -2425,6 +4580,275 @@ def _unflatten_mapping(node, paths, fstruct,
             subnode, subpaths, subfstruct)
     return appstruct
 
+def _unflatten_trie(node, fstruct):
+    # the keys of fstruct below node as a tree of [value, children] entries,
+    # children mapping the next name of the keys to their entry
+    name = node.name
+    root = [_marker, {}]
+    for path, value in fstruct.items():
+        names = path.split('.')
+        if name:
+            assert names[0] == name, "Bad node: %s" % path
+            del names[0]
+        elif not path:
+            names = []
+        entry = root
+        for part in names:
+            children = entry[1]
+            if part in children:
+                entry = children[part]
+            else:
+                entry = children[part] = [_marker, {}]
+        entry[0] = value
+    return root
+
+def _unflatten_kind(node):
+    # how node is unflattened: None if its type overrides unflatten
+    impl = type(node.typ).unflatten
+    return _unflatten_kinds.get(getattr(impl, '__func__', impl))
+
+def _unflatten_entry(node, entry, plans):
+    # plans caches the kind and the children by name of the nodes met, as
+    # the nodes below a sequence are met once per item
+    value, children = entry
+    plan = plans.get(id(node))
+    if plan is None:
+        subnodes = dict((subnode.name, subnode)
+                        for subnode in reversed(node.children))
+        plan = plans[id(node)] = _unflatten_kind(node), subnodes
+    kind, subnodes = plan
+    if kind is None:
+        fstruct = {}
+        _unflatten_paths(entry, node.name, fstruct)
+        return node.typ.unflatten(node, sorted(fstruct.keys()), fstruct)
+    if kind == 'leaf':
+        assert value is not _marker and not children, (
+            "paths should be [name] for leaf nodes.")
+        return value
+    if kind == 'sequence':
+        child = node.children[0]
+        mapstruct = dict((name, _unflatten_entry(child, subentry, plans))
+                         for name, subentry in children.items())
+        return [mapstruct[str(index)] for index in xrange(len(mapstruct))]
+    mapstruct = dict((name, _unflatten_entry(subnodes[name], subentry, plans))
+                     for name, subentry in children.items())
+    if kind == 'tuple':
+        return tuple(mapstruct[subnode.name] for subnode in node.children)
+    return mapstruct
+
+def _unflatten_paths(entry, path, fstruct):
+    # the flattened form of entry, for the unflatten method of a type
+    value, children = entry
+    if value is not _marker:
+        fstruct[path] = value
+    for name, subentry in children.items():
+        _unflatten_paths(subentry, '%s.%s' % (path, name), fstruct)
+
+def _compile_flatten(node, path='', listitem=False):
+    # a (write, iterate) pair of functions flattening the appstructs of
+    # node: write(appstruct, prefix, out) stores the items of the flattened
+    # appstruct in the dictionary out, iterate(appstruct, prefix) yields
+    # them.  The keys of the items are prefix, the part of the keys only
+    # known at runtime (sequence indexes), followed by path and the names
+    # below node, which are joined here once.
+    typ = node.typ
+    kind = _flatten_kind(node)
+
+    if kind is None:
+        def flatten(appstruct, prefix):
+            return typ.flatten(node, appstruct, prefix=prefix + path,
+                               listitem=listitem)
+
+        def write(appstruct, prefix, out):
+            out.update(flatten(appstruct, prefix))
+
+        def iterate(appstruct, prefix):
+            return iter(flatten(appstruct, prefix).items())
+
+        return write, iterate
+
+    if kind == 'leaf':
+        key = _flatten_key(node, path) # the items of sequences are inlined
+
+        def write(appstruct, prefix, out):
+            out[(prefix + key) if key else prefix.rstrip('.')] = appstruct
+
+        def iterate(appstruct, prefix):
+            yield (prefix + key) if key else prefix.rstrip('.'), appstruct
+
+        return write, iterate
+
+    if listitem:
+        selfpath = path
+    elif node.name or kind != 'mapping':
+        selfpath = '%s%s.' % (path, node.name)
+    else:
+        selfpath = path
+
+    if kind == 'sequence':
+        child = node.children[0]
+        if _flatten_kind(child) == 'leaf':
+            item_write = item_iterate = None # the items are the values
+        else:
+            item_write, item_iterate = _compile_flatten(child, '', True)
+
+        def write(appstruct, prefix, out):
+            base = prefix + selfpath
+            if item_write is None:
+                for num, subval in enumerate(appstruct):
+                    out['%s%d' % (base, num)] = subval
+            else:
+                for num, subval in enumerate(appstruct):
+                    item_write(subval, '%s%d.' % (base, num), out)
+
+        def iterate(appstruct, prefix):
+            base = prefix + selfpath
+            for num, subval in enumerate(appstruct):
+                if item_iterate is None:
+                    yield '%s%d' % (base, num), subval
+                else:
+                    for item in item_iterate(subval, '%s%d.' % (base, num)):
+                        yield item
+
+        return write, iterate
+
+    # the children of a mapping or a tuple as (name or index, key, write,
+    # iterate) steps: the leaves whose key is known are stored directly,
+    # the other children are flattened by their write and iterate functions
+    steps = []
+    for num, subnode in enumerate(node.children):
+        ref = num if kind == 'tuple' else subnode.name
+        key = None
+        if _flatten_kind(subnode) == 'leaf':
+            key = _flatten_key(subnode, selfpath)
+        if key:
+            steps.append((ref, key, None, None))
+        else:
+            steps.append(
+                (ref, None) + _compile_flatten(subnode, selfpath, False))
+
+    positional = kind == 'tuple'
+
+    def write(appstruct, prefix, out):
+        for ref, key, subwrite, subiterate in steps:
+            if positional:
+                subval = appstruct[ref]
+            else:
+                subval = appstruct.get(ref, null)
+            if key is None:
+                subwrite(subval, prefix, out)
+            else:
+                out[prefix + key] = subval
+
+    def iterate(appstruct, prefix):
+        for ref, key, subwrite, subiterate in steps:
+            if positional:
+                subval = appstruct[ref]
+            else:
+                subval = appstruct.get(ref, null)
+            if key is None:
+                for item in subiterate(subval, prefix):
+                    yield item
+            else:
+                yield prefix + key, subval
+
+    return write, iterate
+
+def _flatten_kind(node):
+    # how node is flattened: None if its type overrides flatten
+    impl = type(node.typ).flatten
+    return _flatten_kinds.get(getattr(impl, '__func__', impl))
+
+def _flatten_key(node, path):
+    # the part of the key of a leaf node which is known before flattening:
+    # empty if the key is the runtime prefix of node
+    return intern(('%s%s' % (path, node.name)).rstrip('.'))
+
+class Accessor(object):
+    """ Gets and sets the value specified by the dotted name path ``path``
+    in the appstructs of the schema ``node``.  Accessors are returned by
+    :meth:`colander.SchemaNode.accessor`.
+
+    The path is split and resolved against the schema once, when the
+    accessor is created: each name becomes the key of a mapping, or the
+    index of a tuple or sequence.  Nodes whose type overrides
+    ``get_value`` or ``set_value`` get the rest of the path through those
+    methods.  The accessor reflects the schema as it was when it was
+    created.
+    """
+    def __init__(self, node, path):
+        self.path = path
+        keys = [] # the key of each container along the path
+        tuples = [] # whether each container is a tuple
+        rest = path
+        while rest is not None:
+            kind = _value_kind(node)
+            if kind is None:
+                break
+            if '.' in rest:
+                name, rest = rest.split('.', 1)
+            else:
+                name, rest = rest, None
+            if kind == 'leaf':
+                raise KeyError(name)
+            if kind == 'sequence':
+                key = int(name)
+                node = node.children[0]
+            else:
+                pos = _child_position(node, name)
+                key = pos if kind == 'tuple' else name
+                node = node.children[pos]
+            keys.append(key)
+            tuples.append(kind == 'tuple')
+        self._keys = tuple(keys)
+        self._tuples = tuple(tuples)
+        self._rest = rest # the path below a type with its own methods
+        self.node = node
+
+    def _get_rest(self, value):
+        return self.node.typ.get_value(self.node, value, self._rest)
+
+    def get(self, appstruct):
+        """ Return the value at the path in ``appstruct``. """
+        for key in self._keys:
+            appstruct = appstruct[key]
+        if self._rest is not None:
+            return self._get_rest(appstruct)
+        return appstruct
+
+    def set(self, appstruct, value):
+        """ Set the value at the path in ``appstruct`` to ``value``.  The
+        containers along the path are changed in place, except for tuples,
+        which are replaced by updated copies; the updated appstruct is
+        returned, which is a new object if ``appstruct`` is a tuple."""
+        containers = []
+        for key in self._keys:
+            containers.append(appstruct)
+            appstruct = appstruct[key]
+        if self._rest is not None:
+            value = self.node.typ.set_value(
+                self.node, appstruct, self._rest, value)
+        for key, is_tuple, container in reversed(
+                list(zip(self._keys, self._tuples, containers))):
+            if not is_tuple:
+                container[key] = value
+                return containers[0]
+            container = list(container)
+            container[key] = value
+            value = tuple(container)
+        return value
+
+def _value_kind(node):
+    # how the values at the paths of node are reached: None if its type
+    # overrides get_value or set_value
+    typ = type(node.typ)
+    getter = getattr(typ.get_value, '__func__', typ.get_value)
+    setter = getattr(typ.set_value, '__func__', typ.set_value)
+    kind = _value_kinds.get(getter)
+    if kind is None or _value_kinds.get(setter) != kind:
+        return None
+    return kind
+
 class instantiate(object):
     """
     A decorator which can be used to instantiate :class:`SchemaNode`
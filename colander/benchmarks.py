@@ -0,0 +1,709 @@
+""" Benchmarks of colander's hot paths.
+
+Run them with::
+
+    $ python -m colander.benchmarks [--number N] [name ...]
+
+Results are written to standard output as a JSON object mapping the name of
+each benchmark to the best time, in seconds, of one operation of each of
+its cases.  The ``--smoke`` option runs every case once on inputs a
+hundred times smaller, to check that the benchmarks work rather than to
+time anything.  Cases whose name ends with ``_bytes`` report the peak memory,
+in bytes, allocated by one operation instead; they are only run on Pythons
+which provide :mod:`tracemalloc`.
+"""
+import json
+import subprocess
+import sys
+import timeit
+
+import colander
+
+_benchmarks = []
+_divisor = 1 # the divisor of the sizes of the inputs, see ``run``
+
+def benchmark(func):
+    """ Register ``func`` as a benchmark.  A benchmark is called with the
+    number of times each of its cases should be run, and returns a
+    dictionary mapping case names to the best time of one run."""
+    _benchmarks.append(func)
+    return func
+
+def size(count):
+    """ Return the size of an input of ``count`` items, which is smaller
+    during smoke runs."""
+    return max(count // _divisor, 1)
+
+def measure(func, number, repeat=3):
+    """ Return the best time, in seconds, of one call of ``func`` over
+    ``repeat`` batches of ``number`` calls, or of a single batch during
+    smoke runs."""
+    if _divisor != 1:
+        repeat = 1
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+def measure_memory(func):
+    """ Return the peak memory, in bytes, allocated during one call of
+    ``func``, or ``None`` if :mod:`tracemalloc` is not available."""
+    try:
+        import tracemalloc
+    except ImportError: # pragma: no cover
+        return None
+    func() # warm up caches
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def measure_import(module, number):
+    """ Return the best cumulative time, in seconds, reported by
+    ``python -X importtime`` for importing ``module`` in ``number`` fresh
+    interpreters, or ``None`` if the interpreter does not support
+    ``-X importtime``."""
+    best = None
+    for i in range(number):
+        output = subprocess.Popen(
+            [sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+            stderr=subprocess.PIPE).communicate()[1]
+        for line in output.decode('ascii', 'replace').splitlines():
+            fields = line.split('|')
+            if len(fields) == 3 and fields[2].strip() == module:
+                elapsed = int(fields[1]) / 1e6 # reported in microseconds
+                if best is None or elapsed < best:
+                    best = elapsed
+    return best
+
+class Item(colander.MappingSchema):
+    id = colander.SchemaNode(colander.Integer())
+    name = colander.SchemaNode(colander.String(),
+                               validator=colander.Length(1, 100))
+    price = colander.SchemaNode(colander.Decimal(), missing=None)
+    active = colander.SchemaNode(colander.Boolean(), missing=False)
+
+def _items(count, invalid_every=10):
+    items = []
+    for i in range(count):
+        item = {'id': str(i), 'name': 'item %d' % i, 'price': '1.5',
+                'active': 'true'}
+        if invalid_every and i % invalid_every == 0:
+            item['id'] = 'x'
+        items.append(item)
+    return items
+
+@benchmark
+def deserialize_many(number):
+    schema = Item()
+    cstructs = _items(size(1000))
+
+    def loop():
+        results = []
+        for cstruct in cstructs:
+            try:
+                results.append(schema.deserialize(cstruct))
+            except colander.Invalid as e:
+                results.append(e)
+        return results
+
+    return {
+        'loop_1000': measure(loop, number),
+        'deserialize_many_1000': measure(
+            lambda: schema.deserialize_many(cstructs), number),
+        }
+
+@benchmark
+def fail_fast(number):
+    class Items(colander.SequenceSchema):
+        item = Item()
+    schema = Items()
+    garbage = _items(size(1000), invalid_every=1)
+
+    def deserialize(**kw):
+        try:
+            schema.deserialize(garbage, **kw)
+        except colander.Invalid:
+            pass
+
+    return {
+        'full_1000': measure(deserialize, number),
+        'fail_fast_1000': measure(lambda: deserialize(fail_fast=True),
+                                  number),
+        }
+
+@benchmark
+def validate(number):
+    class Items(colander.SequenceSchema):
+        item = Item()
+    schema = Items()
+    cstructs = _items(size(1000), invalid_every=None)
+
+    def deserialize():
+        schema.deserialize(cstructs)
+
+    def validate():
+        schema.validate(cstructs)
+
+    wide = _wide_schema(size(200))
+    wide_cstruct = dict(('field%d' % i, str(i)) for i in range(size(200)))
+    results = {
+        'deserialize_1000': measure(deserialize, number),
+        'validate_1000': measure(validate, number),
+        'deserialize_wide_200': measure(
+            lambda: wide.deserialize(wide_cstruct), number),
+        'validate_wide_200': measure(
+            lambda: wide.validate(wide_cstruct), number),
+        }
+    for name, func in (('deserialize', deserialize), ('validate', validate)):
+        peak = measure_memory(func)
+        if peak is not None:
+            results['%s_1000_bytes' % name] = peak
+    return results
+
+@benchmark
+def parallel(number):
+    from colander.parallel import ParallelDeserializer
+    schema = Item()
+    cstructs = _items(size(5000))
+    with ParallelDeserializer(schema) as deserializer:
+        deserializer.deserialize(cstructs[:1]) # start the pool
+        return {
+            'loop_5000': measure(lambda: schema.deserialize_many(cstructs),
+                                 number),
+            'parallel_5000': measure(
+                lambda: deserializer.deserialize(cstructs), number),
+            }
+
+def _wide_schema(width):
+    schema = colander.SchemaNode(colander.Mapping())
+    for i in range(width):
+        schema.add(colander.SchemaNode(colander.Int(), name='field%d' % i))
+    return schema
+
+def _deep_schema(depth):
+    schema = colander.SchemaNode(colander.Int(), name='leaf')
+    for i in range(depth):
+        schema = colander.SchemaNode(colander.Mapping(), schema,
+                                     name='level%d' % i)
+    return schema
+
+def _deep_cstruct(depth):
+    cstruct = '1'
+    for i in range(depth):
+        cstruct = {('level%d' % (i - 1)) if i else 'leaf': cstruct}
+    return cstruct
+
+@benchmark
+def wide_mapping(number):
+    schema = _wide_schema(500)
+    cstruct = dict(('field%d' % i, str(i)) for i in range(500))
+    appstruct = schema.deserialize(cstruct)
+    return {
+        'deserialize_500': measure(lambda: schema.deserialize(cstruct),
+                                   number),
+        'serialize_500': measure(lambda: schema.serialize(appstruct),
+                                 number),
+        }
+
+@benchmark
+def deep_nesting(number):
+    schema = _deep_schema(100)
+    cstruct = _deep_cstruct(100)
+    return {
+        'deserialize_100': measure(lambda: schema.deserialize(cstruct),
+                                   number),
+        }
+
+@benchmark
+def large_sequence(number):
+    class Items(colander.SequenceSchema):
+        item = Item()
+    schema = Items()
+    cstructs = _items(size(5000), invalid_every=None)
+    return {
+        'deserialize_5000': measure(lambda: schema.deserialize(cstructs),
+                                    number),
+        }
+
+@benchmark
+def bind(number):
+    @colander.deferred
+    def deferred_missing(node, kw):
+        return kw['missing']
+    deferreds = _wide_schema(250)
+    deferreds.name = 'deferreds'
+    for i in range(0, 250, 10):
+        deferreds['field%d' % i].missing = deferred_missing
+    constants = _wide_schema(250)
+    constants.name = 'constants'
+    schema = colander.SchemaNode(colander.Mapping(), deferreds, constants)
+    return {
+        'bind_500': measure(lambda: schema.bind(missing=0), number),
+        'bind_shared_500': measure(lambda: schema.bind_shared(missing=0),
+                                   number),
+        }
+
+@benchmark
+def mapping_copies(number):
+    schema = _wide_schema(50)
+    cstructs = [dict(('field%d' % i, str(i)) for i in range(50))
+                for j in range(size(100))]
+    extra = dict(('extra%d' % i, {'values': list(range(10))})
+                 for i in range(50))
+    preserving = _wide_schema(50)
+    preserving.typ.unknown = 'preserve'
+    shallow = _wide_schema(50)
+    shallow.typ.unknown = 'preserve'
+    shallow.typ.copy_unknown = False
+    documents = [dict(cstruct, **extra) for cstruct in cstructs]
+
+    def each(schema, cstructs):
+        def run():
+            for cstruct in cstructs:
+                schema.deserialize(cstruct)
+        return run
+
+    results = {
+        'deserialize_100': measure(each(schema, cstructs), number),
+        'preserve_100': measure(each(preserving, documents), number),
+        'preserve_shallow_100': measure(each(shallow, documents), number),
+        }
+    peak = measure_memory(each(schema, documents))
+    if peak is not None:
+        results['deserialize_100_bytes'] = peak
+    return results
+
+@benchmark
+def unknown_keys(number):
+    schema = _wide_schema(500)
+    schema.typ.unknown = 'raise'
+    compiled = schema.compile()
+    cstruct = dict(('field%d' % i, str(i)) for i in range(500))
+    cstruct['extra'] = 'x'
+
+    def reject(deserialize):
+        def run():
+            try:
+                deserialize(cstruct)
+            except colander.Invalid:
+                pass
+        return run
+
+    return {
+        'reject_500': measure(reject(schema.deserialize), number),
+        'compiled_reject_500': measure(reject(compiled), number),
+        }
+
+@benchmark
+def flatten(number):
+    class Items(colander.SequenceSchema):
+        item = Item()
+    schema = colander.SchemaNode(colander.Mapping())
+    schema.add(Items(name='items'))
+    wide = _wide_schema(100)
+    wide.name = 'wide'
+    schema.add(wide)
+    appstruct = {
+        'items': schema['items'].deserialize(
+            _items(size(100), invalid_every=None)),
+        'wide': dict(('field%d' % i, i) for i in range(100)),
+        }
+    fstruct = schema.flatten(appstruct)
+    compiled = schema.compile_flatten()
+    return {
+        'flatten_500': measure(lambda: schema.flatten(appstruct), number),
+        'compiled_flatten_500': measure(lambda: compiled(appstruct), number),
+        'unflatten_500': measure(lambda: schema.unflatten(fstruct), number),
+        }
+
+def _orders():
+    # a schema of nested sequences of mappings and an appstruct of 100 orders
+    # of 20 lines, which flattens to 4100 items outside of smoke runs
+    class Line(colander.MappingSchema):
+        sku = colander.SchemaNode(colander.String())
+        quantity = colander.SchemaNode(colander.Int())
+    class Lines(colander.SequenceSchema):
+        line = Line()
+    class Order(colander.MappingSchema):
+        id = colander.SchemaNode(colander.Int())
+        lines = Lines()
+    class Orders(colander.SequenceSchema):
+        order = Order()
+    schema = colander.SchemaNode(colander.Mapping())
+    schema.add(Orders(name='orders'))
+    appstruct = {'orders': [
+        {'id': i, 'lines': [{'sku': 'sku%d' % j, 'quantity': j}
+                            for j in range(20)]}
+        for i in range(size(100))]}
+    return schema, appstruct
+
+@benchmark
+def flatten_nested(number):
+    schema, appstruct = _orders()
+    flatten = schema.compile_flatten()
+    iterate = schema.compile_flatten(iterate=True)
+
+    def consume():
+        for item in iterate(appstruct):
+            pass
+
+    return {
+        'flatten_4100': measure(lambda: schema.flatten(appstruct), number),
+        'compiled_4100': measure(lambda: flatten(appstruct), number),
+        'compiled_iterate_4100': measure(consume, number),
+        }
+
+@benchmark
+def accessor(number):
+    schema, appstruct = _orders()
+    path = 'orders.%d.lines.10.quantity' % (size(100) // 2)
+    accessor = schema.accessor(path)
+    paths = sorted(schema.flatten(appstruct))
+
+    def get_value():
+        for i in range(size(1000)):
+            schema.get_value(appstruct, path)
+
+    def get():
+        for i in range(size(1000)):
+            accessor.get(appstruct)
+
+    def get_value_each():
+        for path in paths:
+            schema.get_value(appstruct, path)
+
+    return {
+        'get_value_1000': measure(get_value, number),
+        'accessor_get_1000': measure(get, number),
+        'get_value_4100_paths': measure(get_value_each, number),
+        'get_values_4100_paths': measure(
+            lambda: schema.get_values(appstruct, paths), number),
+        }
+
+@benchmark
+def unflatten_nested(number):
+    schema, appstruct = _orders()
+    fstruct = schema.flatten(appstruct)
+    return {
+        'unflatten_4100': measure(lambda: schema.unflatten(fstruct), number),
+        # the sorted paths algorithm of the types' unflatten methods
+        'type_unflatten_4100': measure(
+            lambda: schema.typ.unflatten(schema, sorted(fstruct), fstruct),
+            number),
+        }
+
+@benchmark
+def asdict(number):
+    class Items(colander.SequenceSchema):
+        item = Item()
+    schema = Items()
+    cstructs = [{'id': 'x', 'price': 'y'} for i in range(size(1000))]
+    try:
+        schema.deserialize(cstructs)
+    except colander.Invalid as e:
+        error = e
+    return {
+        'asdict_3000': measure(error.asdict, number),
+        'paths_3000': measure(lambda: list(error.paths()), number),
+        }
+
+@benchmark
+def leaf_types(number):
+    datetime_node = colander.SchemaNode(colander.DateTime())
+    date_node = colander.SchemaNode(colander.Date())
+    decimal_node = colander.SchemaNode(colander.Decimal())
+    email_node = colander.SchemaNode(colander.String(),
+                                     validator=colander.Email())
+    url_node = colander.SchemaNode(colander.String(),
+                                   validator=colander.url)
+    datetimes = ['2018-09-07T12:%02d:%02d+02:00' % (i // 60 % 60, i % 60)
+                 for i in range(size(1000))]
+    dates = ['2018-%02d-%02d' % (i % 12 + 1, i % 28 + 1)
+             for i in range(size(1000))]
+    decimals = ['%d.%02d' % (i, i % 100) for i in range(size(1000))]
+    emails = ['user%d@example%d.com' % (i, i) for i in range(size(1000))]
+    urls = ['https://www.example.com/path/%d?query=%d#fragment' % (i, i)
+            for i in range(size(1000))]
+
+    def each(node, cstructs):
+        deserialize = node.deserialize
+        def run():
+            for cstruct in cstructs:
+                deserialize(cstruct)
+        return run
+
+    return {
+        'datetime_1000': measure(each(datetime_node, datetimes), number),
+        'date_1000': measure(each(date_node, dates), number),
+        'decimal_1000': measure(each(decimal_node, decimals), number),
+        'email_1000': measure(each(email_node, emails), number),
+        'url_1000': measure(each(url_node, urls), number),
+        }
+
+@benchmark
+def iso8601_formats(number):
+    from iso8601 import iso8601
+    datetime_node = colander.SchemaNode(colander.DateTime())
+    date_node = colander.SchemaNode(colander.Date())
+    time_node = colander.SchemaNode(colander.Time())
+    formats = {
+        'utc': '2018-09-07T12:30:15Z',
+        'offset': '2018-09-07T12:30:15+02:00',
+        'naive': '2018-09-07T12:30:15',
+        'fraction': '2018-09-07T12:30:15.123456Z',
+        'date': '2018-09-07',
+        'basic': '20180907T123015Z',
+        }
+    results = {}
+    for name, value in formats.items():
+        results['%s_iso8601' % name] = measure(
+            lambda: iso8601.parse_date(value), number * size(1000))
+        results['%s_datetime' % name] = measure(
+            lambda: datetime_node.deserialize(value), number * size(1000))
+    results['date_date'] = measure(
+        lambda: date_node.deserialize('2018-09-07'), number * size(1000))
+    results['time_time'] = measure(
+        lambda: time_node.deserialize('12:30:15'), number * size(1000))
+    results['time_short_time'] = measure(
+        lambda: time_node.deserialize('12:30'), number * size(1000))
+    return results
+
+@benchmark
+def conversion_cache(number):
+    # 1000 values drawn from 50 distinct timestamps and amounts
+    timestamps = ['2018-09-07T12:%02d:00Z' % (i % 50) for i in range(size(1000))]
+    amounts = ['%d.99' % (i % 50) for i in range(size(1000))]
+    results = {}
+    for name, typ, cstructs in (
+        ('datetime', colander.DateTime, timestamps),
+        ('decimal', colander.Decimal, amounts)):
+        for cache_size in (None, 100):
+            node = colander.SchemaNode(typ(cache_size=cache_size))
+            def run(deserialize=node.deserialize, cstructs=cstructs):
+                for cstruct in cstructs:
+                    deserialize(cstruct)
+            key = '%s_%s_1000' % (name, 'cached' if cache_size else 'plain')
+            results[key] = measure(run, number)
+    return results
+
+@benchmark
+def global_object(number):
+    node = colander.SchemaNode(colander.GlobalObject(None))
+    names = {
+        'colon': 'colander.benchmarks:Item.__init__',
+        'dotted': 'colander.benchmarks.Item.__init__',
+        }
+    results = {}
+    for style, name in names.items():
+        def uncached(name=name):
+            colander.GlobalObject.clear_cache()
+            node.deserialize(name)
+        results['%s_uncached' % style] = measure(uncached, number * size(1000))
+        results['%s_cached' % style] = measure(
+            lambda name=name: node.deserialize(name), number * size(1000))
+    return results
+
+@benchmark
+def url(number):
+    import re
+    regex = colander.Regex(re.compile(colander.URL_REGEX))
+    urls = ['https://www.example.com/path/%d?query=%d#fragment' % (i, i)
+            for i in range(size(1000))]
+    # URL_REGEX backtracks exponentially on these
+    adversarial = 'http://' + '!' * 16 + ' '
+    long_adversarial = 'http://' + '!' * size(100000) + ' '
+
+    def each(validator, values):
+        def run():
+            for value in values:
+                try:
+                    validator(None, value)
+                except colander.Invalid:
+                    pass
+        return run
+
+    return {
+        'regex_1000': measure(each(regex, urls), number),
+        'validator_1000': measure(each(colander.url, urls), number),
+        'regex_adversarial_16': measure(each(regex, [adversarial]), number),
+        'validator_adversarial_16': measure(
+            each(colander.url, [adversarial]), number),
+        'validator_adversarial_100000': measure(
+            each(colander.url, [long_adversarial]), number),
+        }
+
+@benchmark
+def string_rules(number):
+    choices = ['choice %d' % i for i in range(50)]
+    rules = (colander.Length(1, 100), colander.Regex('^[a-z0-9 ]+$'),
+             colander.OneOf(choices), colander.NoneOf(['choice 0']))
+    schema = colander.SchemaNode(colander.Mapping())
+    for i in range(200):
+        schema.add(colander.SchemaNode(colander.String(), name='field%d' % i,
+                                       validator=colander.All(*rules)))
+    cstruct = dict(('field%d' % i, choices[i % 49 + 1]) for i in range(200))
+    values = [choices[i % 49 + 1] for i in range(1000)]
+    compiled = schema.compile()
+
+    def each(validator):
+        def run():
+            for value in values:
+                validator(None, value)
+        return run
+
+    return {
+        'all_1000': measure(each(colander.All(*rules)), number),
+        'string_rules_1000': measure(each(colander.StringRules(*rules)),
+                                     number),
+        'deserialize_200': measure(lambda: schema.deserialize(cstruct),
+                                   number),
+        'compiled_200': measure(lambda: compiled(cstruct), number),
+        }
+
+@benchmark
+def choices(number):
+    codes = ['CODE%05d' % i for i in range(5000)]
+    one_of = colander.OneOf(codes)
+    none_of = colander.NoneOf(codes)
+    contains_only = colander.ContainsOnly(codes)
+    values = [codes[i * 5] for i in range(1000)]
+
+    def each(validator, values):
+        def run():
+            for value in values:
+                try:
+                    validator(None, value)
+                except colander.Invalid:
+                    pass
+        return run
+
+    return {
+        'one_of_1000': measure(each(one_of, values), number),
+        'one_of_invalid_1000': measure(each(one_of, ['x'] * 1000), number),
+        'none_of_1000': measure(each(none_of, values), number),
+        'contains_only_100': measure(
+            each(contains_only, [values[:10]] * 100), number),
+        }
+
+@benchmark
+def errors(number):
+    node = colander.SchemaNode(
+        colander.Mapping(),
+        colander.SchemaNode(colander.Int(), name='a'),
+        colander.SchemaNode(colander.String(), name='b',
+                            validator=colander.Length(max=5)))
+    cstructs = [{'a': 'x%d' % i, 'b': 'too long'} for i in range(size(1000))]
+    huge = list(range(size(100000)))
+
+    def each(cstructs, render):
+        def run():
+            for cstruct in cstructs:
+                try:
+                    node.deserialize(cstruct)
+                except colander.Invalid as e:
+                    if render:
+                        e.asdict()
+        return run
+
+    return {
+        'discarded_1000': measure(each(cstructs, False), number),
+        'rendered_1000': measure(each(cstructs, True), number),
+        'huge_rendered_100': measure(each([huge] * size(100), True),
+                                     number),
+        }
+
+@benchmark
+def error_tree(number):
+    schema = colander.SchemaNode(
+        colander.Mapping(),
+        colander.SchemaNode(
+            colander.Sequence(),
+            colander.SchemaNode(
+                colander.Mapping(),
+                colander.SchemaNode(colander.Int(), name='a'),
+                colander.SchemaNode(colander.Int(), name='b'),
+                name='item'),
+            name='items'),
+        name='')
+    try:
+        schema.deserialize(
+            {'items': [{'a': 'x', 'b': 'y'} for i in range(size(10000))]})
+    except colander.Invalid as e:
+        exc = e
+    for path in exc.paths(): # build the messages once
+        path[-1].msg
+
+    def consume(iterable):
+        for item in iterable:
+            pass
+
+    return {
+        'paths_20000': measure(lambda: consume(exc.paths()), number),
+        'asdict_20000': measure(exc.asdict, number),
+        'iter_errors_20000': measure(
+            lambda: consume(exc.iter_errors()), number),
+        }
+
+@benchmark
+def schema_class(number):
+    attrs = dict(
+        ('field%d' % i, colander.SchemaNode(colander.String()))
+        for i in range(100))
+
+    def define():
+        schema_class = type('Schema', (colander.MappingSchema,), attrs)
+        return schema_class()
+
+    return {
+        'class_100': measure(
+            lambda: type('Schema', (colander.MappingSchema,), attrs),
+            number),
+        'class_and_instance_100': measure(define, number),
+        }
+
+@benchmark
+def import_time(number):
+    results = {}
+    elapsed = measure_import('colander', number)
+    if elapsed is not None:
+        results['import_colander'] = elapsed
+    return results
+
+def run(names=None, number=10, smoke=False):
+    """ Run the benchmarks named in ``names`` (all of them by default) and
+    return their results.  If ``smoke`` is true, ``number`` is ignored and
+    the cases are run once on smaller inputs."""
+    global _divisor
+    if smoke:
+        number = 1
+        _divisor = 100
+    results = {}
+    try:
+        for func in _benchmarks:
+            if names and func.__name__ not in names:
+                continue
+            results[func.__name__] = func(number)
+    finally:
+        _divisor = 1
+    return results
+
+def main(argv=None, out=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if out is None:
+        out = sys.stdout
+    argv = list(argv)
+    number = 10
+    if '--number' in argv:
+        pos = argv.index('--number')
+        number = int(argv[pos + 1])
+        del argv[pos:pos + 2]
+    smoke = '--smoke' in argv
+    if smoke:
+        argv.remove('--smoke')
+    results = run(argv, number, smoke)
+    out.write(json.dumps(results, indent=2, sort_keys=True))
+    out.write('\n')
+
+if __name__ == '__main__': # pragma: no cover
+    main()
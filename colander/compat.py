@@ -26,6 +26,12 @@ else:
             return False
         return hasattr(v, '__iter__')
 
+try:
+    intern = sys.intern
+except AttributeError: # pragma: no cover
+    def intern(s):
+        return s # Python 2's intern does not accept unicode strings
+
 try:
     xrange = xrange
 except NameError: # pragma: no cover
@@ -0,0 +1,103 @@
+""" Deserialization of large batches of cstructs in worker processes.
+
+Deserialization is CPU-bound Python code, so a single process only ever uses
+one core.  :class:`ParallelDeserializer` spreads a batch of cstructs over a
+pool of worker processes::
+
+    from colander.parallel import ParallelDeserializer
+
+    with ParallelDeserializer(schema) as deserializer:
+        for appstruct, errors in deserializer.deserialize(cstructs):
+            ...
+
+The schema is sent to each worker once, when the pool starts.  Depending on
+the platform, :mod:`multiprocessing` either forks the workers, in which case
+any schema can be used, or spawns them, in which case the schema must be
+picklable: it must be bound if it uses :class:`colander.deferred` values,
+and it must not use lambdas or other unpicklable objects as validators,
+preparers or types.  The cstructs and the resulting appstructs always cross
+process boundaries and must be picklable.
+"""
+import multiprocessing
+
+import colander
+
+_deserialize = None # the compiled schema of a worker process
+
+def _initialize(schema):
+    global _deserialize
+    _deserialize = schema.compile()
+
+def _deserialize_chunk(cstructs):
+    results = []
+    for cstruct in cstructs:
+        try:
+            results.append((_deserialize(cstruct), None))
+        except colander.Invalid as e:
+            results.append((None, e.asdict()))
+    return results
+
+def chunk_size(count, processes):
+    """ Return the number of cstructs sent to a worker at once when
+    deserializing ``count`` cstructs with ``processes`` workers: small
+    enough to give each worker about four chunks, so that the work stays
+    balanced, but large enough to amortize the cost of a round trip."""
+    size, extra = divmod(count, processes * 4)
+    if extra:
+        size += 1
+    return max(size, 1)
+
+class ParallelDeserializer(object):
+    """ Deserialize batches of cstructs against ``schema`` in a pool of
+    worker processes.
+
+    ``processes`` is the number of workers; it defaults to the number of
+    CPUs.  ``chunksize`` is the number of cstructs sent to a worker at once;
+    by default it is computed from the size of each batch by
+    :func:`colander.parallel.chunk_size`.
+
+    The pool is started by the first call to ``deserialize`` and is reused
+    by later calls until ``close`` is called.  Instances are context
+    managers which close the pool on exit.
+    """
+    def __init__(self, schema, processes=None, chunksize=None):
+        self.schema = schema
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+        self.processes = processes
+        self.chunksize = chunksize
+        self._pool = None
+
+    def deserialize(self, cstructs):
+        """ Deserialize each cstruct of the iterable ``cstructs`` and return
+        a list holding an ``(appstruct, errors)`` pair per cstruct, in
+        input order.  ``errors`` is ``None`` when the cstruct is valid;
+        otherwise ``appstruct`` is ``None`` and ``errors`` is the result of
+        the ``asdict`` method of the :exc:`colander.Invalid` error, as
+        exceptions referring to schema nodes are not sent back from the
+        workers.  Exceptions other than :exc:`colander.Invalid` raised in a
+        worker are raised again here."""
+        cstructs = list(cstructs)
+        if self._pool is None:
+            self._pool = multiprocessing.Pool(
+                self.processes, _initialize, (self.schema,))
+        size = self.chunksize or chunk_size(len(cstructs), self.processes)
+        chunks = [cstructs[pos:pos + size]
+                  for pos in range(0, len(cstructs), size)]
+        results = []
+        for chunk_results in self._pool.imap(_deserialize_chunk, chunks):
+            results.extend(chunk_results)
+        return results
+
+    def close(self):
+        """ Stop the worker processes. """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,57 @@
+import json
+import unittest
+
+class TestBenchmarks(unittest.TestCase):
+    def _callFUT(self, argv):
+        from colander.benchmarks import main
+        from colander.compat import text_type
+        import io
+        out = io.StringIO()
+        out_write = out.write
+        out.write = lambda s: out_write(text_type(s))
+        main(argv, out)
+        return json.loads(out.getvalue())
+
+    def test_run_all(self):
+        from colander.benchmarks import _benchmarks
+        results = self._callFUT(['--smoke'])
+        self.assertEqual(sorted(results),
+                         sorted(func.__name__ for func in _benchmarks))
+        for cases in results.values():
+            for timing in cases.values():
+                self.assertTrue(timing > 0)
+
+    def test_run_selected(self):
+        results = self._callFUT(['--number', '1', '--smoke',
+                                 'deserialize_many'])
+        self.assertEqual(list(results), ['deserialize_many'])
+        self.assertEqual(sorted(results['deserialize_many']),
+                         ['deserialize_many_1000', 'loop_1000'])
+
+    def test_defaults(self):
+        import sys
+        from colander import benchmarks
+        argv = sys.argv
+        run = benchmarks.run
+        stdout = sys.stdout
+        calls = []
+        class Out(object):
+            def write(self, s):
+                calls.append(s)
+        sys.argv = ['colander.benchmarks', 'deserialize_many']
+        sys.stdout = Out()
+        benchmarks.run = lambda names, number, smoke: {
+            'x': {'names': names, 'number': number, 'smoke': smoke}}
+        try:
+            benchmarks.main()
+        finally:
+            sys.argv = argv
+            sys.stdout = stdout
+            benchmarks.run = run
+        self.assertEqual(json.loads(calls[0]),
+                         {'x': {'names': ['deserialize_many'], 'number': 10,
+                                'smoke': False}})
+
+    def test_run_unknown_name(self):
+        from colander.benchmarks import run
+        self.assertEqual(run(['nonexistent'], 1), {})
@@ -0,0 +1,89 @@
+import unittest
+
+import colander
+
+class Test_chunk_size(unittest.TestCase):
+    def _callFUT(self, count, processes):
+        from colander.parallel import chunk_size
+        return chunk_size(count, processes)
+
+    def test_exact(self):
+        self.assertEqual(self._callFUT(80, 4), 5)
+
+    def test_rounds_up(self):
+        self.assertEqual(self._callFUT(81, 4), 6)
+
+    def test_at_least_one(self):
+        self.assertEqual(self._callFUT(0, 4), 1)
+        self.assertEqual(self._callFUT(3, 4), 1)
+
+class Test_deserialize_chunk(unittest.TestCase):
+    def setUp(self):
+        from colander import parallel
+        self._saved = parallel._deserialize
+
+    def tearDown(self):
+        from colander import parallel
+        parallel._deserialize = self._saved
+
+    def test_it(self):
+        from colander import parallel
+        parallel._initialize(_makeSchema())
+        results = parallel._deserialize_chunk(
+            [{'a': '1'}, {'a': 'x'}, {}])
+        self.assertEqual(results, [
+            ({'a': 1, 'b': 'x'}, None),
+            (None, {'a': '"x" is not a number'}),
+            (None, {'a': 'Required'}),
+            ])
+
+class TestParallelDeserializer(unittest.TestCase):
+    def _makeOne(self, schema, **kw):
+        from colander.parallel import ParallelDeserializer
+        return ParallelDeserializer(schema, **kw)
+
+    def test_ctor_defaults(self):
+        import multiprocessing
+        deserializer = self._makeOne(None)
+        self.assertEqual(deserializer.processes, multiprocessing.cpu_count())
+        self.assertEqual(deserializer.chunksize, None)
+        self.assertEqual(deserializer._pool, None)
+
+    def test_deserialize(self):
+        cstructs = [{'a': str(i)} for i in range(20)]
+        cstructs[7] = {'a': 'x', 'b': 'y'}
+        with self._makeOne(_makeSchema(), processes=2) as deserializer:
+            results = deserializer.deserialize(iter(cstructs))
+            pool = deserializer._pool
+            # the pool is reused by later calls
+            self.assertEqual(deserializer.deserialize([]), [])
+            self.assertTrue(deserializer._pool is pool)
+        self.assertEqual(deserializer._pool, None)
+        self.assertEqual(len(results), 20)
+        self.assertEqual(results[0], ({'a': 0, 'b': 'x'}, None))
+        self.assertEqual(results[7], (None, {'a': '"x" is not a number'}))
+        self.assertEqual(results[19], ({'a': 19, 'b': 'x'}, None))
+
+    def test_deserialize_chunksize(self):
+        cstructs = [{'a': str(i), 'b': 'z'} for i in range(5)]
+        deserializer = self._makeOne(_makeSchema(), processes=1,
+                                     chunksize=2)
+        try:
+            results = deserializer.deserialize(cstructs)
+        finally:
+            deserializer.close()
+        self.assertEqual(results,
+                         [({'a': i, 'b': 'z'}, None) for i in range(5)])
+
+    def test_close_not_started(self):
+        deserializer = self._makeOne(None)
+        deserializer.close()
+        self.assertEqual(deserializer._pool, None)
+
+def _makeSchema():
+    return _Schema()
+
+class _Schema(colander.MappingSchema):
+    # defined at module scope, so that it can be pickled
+    a = colander.SchemaNode(colander.Int())
+    b = colander.SchemaNode(colander.String(), missing='x')